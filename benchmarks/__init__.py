@@ -0,0 +1,7 @@
+"""
+Benchmarks for the rendering hot path of ganim.
+
+Run with `python -m benchmarks.run` from the root of the repository (see `benchmarks.run`). The import time of ganim is
+measured by `python -m benchmarks.importtime`.
+
+"""
@@ -0,0 +1,135 @@
+"""
+Measure how long it takes to import ganim, and fail if it got slower.
+
+Each statement below is run in a fresh interpreter with `python -X importtime`, several times; the best cumulative time
+of the top-level imports is reported, with the slowest modules imported:
+
+* `import ganim`: should be nearly instantaneous, as the core module is imported lazily (see `ganim.__init__`);
+
+* `import ganim; ganim.Scene`: imports matplotlib, but must not import pyplot (nor, thus, an interactive backend).
+
+Usage::
+
+    python -m benchmarks.importtime [--repeat 5] [--max-ms 50] [--output results.json]
+
+The exit status is 1 if `import ganim` takes longer than `--max-ms` milliseconds, or if pyplot gets imported.
+
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+STATEMENTS = {
+    'import': 'import ganim',
+    'scene': 'import ganim; ganim.Scene',
+}
+
+
+def parse_importtime(stderr):
+    """
+    Parse the output of `python -X importtime`.
+
+    :param str stderr:
+
+    :return list[tuple[str, int, bool]]: for each module imported, its name, its cumulative import time (in
+        microseconds) and whether it was imported at the top level (i.e., not by another module).
+
+    """
+
+    imports = []
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative_time, module = line[len('import time:'):].split('|')
+
+        # Modules are indented by two spaces for each level of nesting, after a single space
+        imports.append((module.strip(), int(cumulative_time), not module.startswith('  ')))
+
+    return imports
+
+
+def measure(statement, repeat):
+    """
+    Run a statement in fresh interpreters and return the timings of the fastest run.
+
+    :param str statement:
+
+    :param int repeat:
+
+    :return dict: total time (in milliseconds) of the top-level imports, the 10 slowest modules (with their cumulative
+        times, in milliseconds) and the list of all modules imported.
+
+    """
+
+    best = None
+
+    for _ in range(repeat):
+        process = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', statement],
+                capture_output=True,
+                text=True,
+                check=True
+        )
+        imports = parse_importtime(process.stderr)
+        total = sum(cumulative_time for _, cumulative_time, top_level in imports if top_level)
+
+        if best is None or total < best[0]:
+            best = total, imports
+
+    total, imports = best
+
+    return {
+        'total_ms': total / 1000,
+        'slowest': {
+            module: cumulative_time / 1000
+            for module, cumulative_time, _ in sorted(imports, key=lambda item: -item[1])[:10]
+        },
+        'modules': sorted(module for module, _, _ in imports),
+    }
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Measure the import time of ganim.')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each statement (the fastest is kept)')
+    parser.add_argument('--max-ms', type=float, default=50.0, help='maximum time for `import ganim`')
+    parser.add_argument('--output', help='JSON file for the results (default: standard output)')
+    args = parser.parse_args(argv)
+
+    results = {name: measure(statement, args.repeat) for name, statement in STATEMENTS.items()}
+
+    failures = []
+
+    if results['import']['total_ms'] > args.max_ms:
+        failures.append(f"`import ganim` took {results['import']['total_ms']:.1f} ms (maximum: {args.max_ms} ms)")
+
+    for name, result in results.items():
+        if 'matplotlib.pyplot' in result['modules']:
+            failures.append(f'`{STATEMENTS[name]}` imported matplotlib.pyplot')
+
+    output = json.dumps(
+            {
+                name: {key: value for key, value in result.items() if key != 'modules'}
+                for name, result in results.items()
+            },
+            indent=2
+    )
+
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
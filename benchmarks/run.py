@@ -0,0 +1,159 @@
+"""
+Run the benchmarks and write the results as JSON.
+
+For each scene in `benchmarks.scenes.SCENES`, the time spent in each stage of the rendering is measured separately:
+
+* `cue`: cueing the parts (`Scene.cue_parts`);
+
+* `dispatch`: running the actions for each frame (`Scene.animation_manager`);
+
+* `draw`: rasterizing each frame (`Scene.blit_frame`);
+
+* `encode`: handing each frame to ffmpeg (`FFMpegPipeWriter.write_frame` and `finish`).
+
+Each scene runs in a fresh process, so that the peak resident set size reported for it is its own.
+
+Usage::
+
+    python -m benchmarks.run [--scenes segments points ...] [--dpi 50] [--no-encode] [--usetex] [--output results.json]
+
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+
+def run_scene(name, dpi, encode, usetex):
+    """
+    Build, render and (optionally) encode one of the benchmark scenes, timing each stage.
+
+    :param str name: key of `benchmarks.scenes.SCENES`.
+
+    :param int dpi:
+
+    :param bool encode: if False, frames are drawn but not handed to ffmpeg.
+
+    :param bool usetex: if True, labels are typeset with LaTeX.
+
+    :return dict: timings (in seconds), frames per second and peak resident set size (in MiB).
+
+    """
+
+    matplotlib.use('Agg')
+
+    import ganim as ga
+    from ganim.writers import FFMpegPipeWriter
+    from benchmarks.scenes import SCENES
+
+    ga.reset_default_style()
+    matplotlib.rcParams.update({'text.usetex': usetex, 'figure.dpi': dpi, 'savefig.dpi': dpi})
+
+    kwargs = {'usetex': usetex} if name == 'angles' else {}
+
+    start = time.perf_counter()
+    scene = SCENES[name](**kwargs)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scene.cue_parts()
+    cue_time = time.perf_counter() - start
+
+    dispatch_time = draw_time = encode_time = 0.0
+
+    writer = FFMpegPipeWriter()
+    filename = os.path.join(tempfile.mkdtemp(prefix='ganim-bench-'), name + '.mp4')
+    writer.setup(filename, scene.config.fps)
+
+    scene.blit = True
+    ticker = scene.scene_ticker()
+
+    for tick in ticker:
+        t0 = time.perf_counter()
+        touched_artists = scene.animation_manager(tick)
+        t1 = time.perf_counter()
+        scene.blit_frame(touched_artists)
+        t2 = time.perf_counter()
+        if encode:
+            writer.write_frame(scene.fig.canvas.buffer_rgba())
+        t3 = time.perf_counter()
+
+        dispatch_time += t1 - t0
+        draw_time += t2 - t1
+        encode_time += t3 - t2
+
+    t0 = time.perf_counter()
+    writer.finish()
+    encode_time += time.perf_counter() - t0
+
+    if os.path.exists(filename):
+        os.remove(filename)
+    os.rmdir(os.path.dirname(filename))
+
+    total_time = cue_time + dispatch_time + draw_time + encode_time
+
+    return {
+        'frames': len(ticker),
+        'build': build_time,
+        'cue': cue_time,
+        'dispatch': dispatch_time,
+        'draw': draw_time,
+        'encode': encode_time,
+        'total': total_time,
+        'fps': len(ticker) / total_time,
+        # ru_maxrss is in KiB on Linux, in bytes on macOS
+        'peak_rss_mb': (
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+        ),
+    }
+
+
+def main(argv=None):
+
+    # Imported here, so that the child processes do not depend on it being importable before they set the backend
+    from benchmarks.scenes import SCENES
+
+    parser = argparse.ArgumentParser(description='Run the ganim rendering benchmarks.')
+    parser.add_argument('--scenes', nargs='+', choices=sorted(SCENES), default=list(SCENES))
+    parser.add_argument('--dpi', type=int, default=50)
+    parser.add_argument('--no-encode', action='store_true', help='draw frames without encoding them')
+    parser.add_argument('--usetex', action='store_true', help='typeset labels with LaTeX')
+    parser.add_argument('--output', help='JSON file for the results (default: standard output)')
+    args = parser.parse_args(argv)
+
+    results = {
+        'python': platform.python_version(),
+        'matplotlib': matplotlib.__version__,
+        'dpi': args.dpi,
+        'encode': not args.no_encode,
+        'usetex': args.usetex,
+        'scenes': {},
+    }
+
+    # A fresh process for each scene, so that peak memory is measured per scene
+    context = multiprocessing.get_context('spawn')
+
+    for name in args.scenes:
+        with context.Pool(1) as pool:
+            results['scenes'][name] = pool.apply(run_scene, (name, args.dpi, not args.no_encode, args.usetex))
+        print(f"{name}: {results['scenes'][name]['fps']:.1f} frames/s", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
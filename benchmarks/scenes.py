@@ -0,0 +1,138 @@
+"""
+Synthetic scenes for the benchmarks.
+
+Each function builds and returns a scene (not cued). Random positions come from a generator with a fixed seed, so the
+scenes are the same in every run.
+
+"""
+
+import numpy as np
+
+import ganim as ga
+from ganim.angles import DoAngle
+from ganim.line_elements import DoLineSegment
+from ganim.points import DoPoint
+from ganim.polygons import DoPolygon
+
+
+def random_points(n, seed=0):
+    """
+    Return `n` random points inside the default limits of a scene, as a list of tuples.
+
+    """
+
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(ga.XLIM_DEFAULT[0], ga.XLIM_DEFAULT[1], n)
+    ys = rng.uniform(ga.YLIM_DEFAULT[0], ga.YLIM_DEFAULT[1], n)
+
+    return [(float(x), float(y)) for x, y in zip(xs, ys)]
+
+
+def segments_scene(n=300, duration=2):
+    """
+    Many line segments: grow in the first part, shrink in the second.
+
+    """
+
+    points = random_points(2 * n)
+    scene = ga.Scene()
+
+    scene.add_part(
+            [DoLineSegment(a, b, effect='grow') for a, b in zip(points[::2], points[1::2])],
+            duration=duration
+    )
+    scene.add_part(
+            [DoLineSegment(a, b, effect='shrink') for a, b in zip(points[::2], points[1::2])],
+            duration=duration
+    )
+
+    return scene
+
+
+def polygons_scene(n=20, no_of_vertices=500, duration=2):
+    """
+    Large polygons (regular, with many vertices) fading in, then staying still.
+
+    """
+
+    scene = ga.Scene()
+    angles = np.linspace(0, 2 * np.pi, no_of_vertices, endpoint=False)
+    centers = random_points(n, seed=1)
+
+    polygons = [
+        DoPolygon(
+                [(float(x + np.cos(t)), float(y + np.sin(t))) for t in angles],
+                effect='fadein',
+                facealpha=0.2
+        )
+        for x, y in centers
+    ]
+
+    scene.add_part(polygons, duration=duration)
+    scene.add_part([DoPoint(centers[0])], duration=duration)
+
+    return scene
+
+
+def points_scene(n=2000, duration=2):
+    """
+    A dense cloud of points fading in.
+
+    """
+
+    scene = ga.Scene()
+    scene.add_part([DoPoint(p, effect='fadein') for p in random_points(n, seed=2)], duration=duration)
+
+    return scene
+
+
+def angles_scene(n=20, duration=2, usetex=False):
+    """
+    Labeled angles fading in.
+
+    """
+
+    scene = ga.Scene()
+    script = []
+
+    for i, (x, y) in enumerate(random_points(n, seed=3)):
+        seg1 = DoLineSegment((x, y), (x + 1, y + 0.5))
+        seg2 = DoLineSegment((x, y), (x + 0.2, y + 1))
+        script += [
+            seg1,
+            seg2,
+            DoAngle((x, y), seg1, seg2, effect='fadein', label=rf'$\alpha_{{{i}}}$', usetex=usetex),
+        ]
+
+    scene.add_part(script, duration=duration)
+
+    return scene
+
+
+def many_parts_scene(no_of_parts=60, duration=1):
+    """
+    Many short parts, with elements staying from one part to the next.
+
+    """
+
+    scene = ga.Scene()
+    points = random_points(2 * no_of_parts, seed=4)
+
+    for i in range(no_of_parts):
+        a, b = points[2 * i], points[2 * i + 1]
+        scene.add_part(
+                [DoLineSegment(a, b, effect='grow'), DoPoint(b, effect='fadein', stay=False)],
+                duration=duration
+        )
+
+    return scene
+
+
+# Scenes run by default, by name
+SCENES = {
+    'segments': segments_scene,
+    'polygons': polygons_scene,
+    'points': points_scene,
+    'angles': angles_scene,
+    'many-parts': many_parts_scene,
+}
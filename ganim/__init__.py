@@ -1,4 +1,63 @@
-from .core import *
+"""
+ganim: geometric animations with matplotlib.
+
+Importing the package is cheap: the core module (and matplotlib with it) is only imported when one of its names (e.g.,
+`ganim.Scene`) is first used, and so are the modules of the element classes (e.g., `ganim.DoPolygon`). Pyplot is only
+imported for scenes that are previewed on screen (see `Scene`).
+
+"""
+
+import importlib
 
 name = 'ganim'
 __version__ = '0.0.1'
+
+# Names exported by the package (also by `from ganim import *`), and the modules they are imported from on first use
+EXPORTS = {
+    'FPS': 'ganim.core',
+    'FPS_DEFAULT': 'ganim.core',
+    'INTERVAL': 'ganim.core',
+    'INTERVAL_DEFAULT': 'ganim.core',
+    'QUALITY_PROFILES': 'ganim.core',
+    'XLIM': 'ganim.core',
+    'XLIM_DEFAULT': 'ganim.core',
+    'YLIM': 'ganim.core',
+    'YLIM_DEFAULT': 'ganim.core',
+    'Part': 'ganim.core',
+    'Scene': 'ganim.core',
+    'SceneConfig': 'ganim.core',
+    'Ticker': 'ganim.core',
+    'quality_config': 'ganim.core',
+    'reset_default_config': 'ganim.core',
+    'reset_default_style': 'ganim.core',
+    'DoElement': 'ganim.elements',
+    'DoLineSegment': 'ganim.line_elements',
+    'DoPolygon': 'ganim.polygons',
+    'DoAngle': 'ganim.angles',
+    'DoPoint': 'ganim.points',
+    'DoPoints': 'ganim.points',
+}
+
+__all__ = ['name', '__version__'] + list(EXPORTS)
+
+
+def __getattr__(attr):
+    """
+    Return an exported name (see `EXPORTS`) or any other name from `ganim.core`, importing its module on first use.
+
+    """
+
+    # Submodules are found by the import system before this is called; only the names of modules get here
+    module = importlib.import_module(EXPORTS.get(attr, 'ganim.core'))
+
+    try:
+        return getattr(module, attr)
+    except AttributeError:
+        raise AttributeError(f"module 'ganim' has no attribute '{attr}'") from None
+
+
+def __dir__():
+
+    import ganim.core
+
+    return sorted(set(globals()) | set(EXPORTS) | {attr for attr in dir(ganim.core) if not attr.startswith('_')})
@@ -0,0 +1,11 @@
+"""
+Command line interface: `python -m ganim render ...` (see `ganim.cli`).
+
+"""
+
+import sys
+
+from ganim.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,12 +4,15 @@ Angles.
 from math import cos, radians, sin
 
 import numpy as np
+from matplotlib import rcParams
 from matplotlib.colors import to_rgba
+from matplotlib.offsetbox import AnnotationBbox, OffsetImage
 from matplotlib.patches import Wedge, Polygon
-from matplotlib.text import Text
 from matplotlib.transforms import Affine2D
 
+from ganim.cache import get_label_cache
 from ganim.elements import DoElement
+from ganim.geometry import as_segment
 
 
 class DoAngle(DoElement):
@@ -20,9 +23,10 @@ class DoAngle(DoElement):
     
         * `center`: tuple (x0, y0), center of angle
 
-        * `seg1`: a line segment, instance of DoLineSegment
+        * `seg1`: a line segment: instance of DoLineSegment or of ganim.geometry.Segment (e.g., a side of a
+          DoPolygon), or a pair of points
 
-        * `seg2`: a line segment, instance of DoLineSegment
+        * `seg2`: a line segment (as `seg1`)
 
     * **Keyword arguments:**
 
@@ -50,18 +54,46 @@ class DoAngle(DoElement):
 
         * `labelcolor`: default: 'w'
 
+        * `labelsize`: font size of label (default: 30)
+
+        * `usetex`: if True, typeset label with LaTeX; if False, with mathtext (default: None, i.e.,
+          rcParams['text.usetex'] when the label is drawn)
+
+    The label is rasterized only once (see `ganim.cache.LabelCache`) and drawn as an image.
+
     """
 
-    def __init__(self, *args, **kwargs):
+    # Effects of this class (see DoElement.effects)
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+    }
+
+    # Default properties of angles
+    default_artist_kwargs = {
+        'facecolor': 'yellow',
+        'edgecolor': 'w',
+        'edgealpha': 1.0,
+        'facealpha': 0.1,
+        'linewidth': 2.0,
+    }
+
+    __slots__ = (
+        'center',
+        'seg1',
+        'seg2',
+        'radius',
+        'theta1',
+        'theta2',
+        'angle',
+        'label',
+        'x_label',
+        'y_label',
+        'labelcolor',
+        'labelsize',
+        'usetex',
+    )
 
-        # Default properties of angles
-        self.default_artist_kwargs = {
-            'facecolor': 'yellow',
-            'edgecolor': 'w',
-            'edgealpha': 1.0,
-            'facealpha': 0.1,
-            'linewidth': 2.0,
-        }
+    def __init__(self, *args, **kwargs):
 
         # super() will store kwargs in the self.args dictionary and in the
         # self.artist.kwargs dictionary
@@ -95,6 +127,10 @@ class DoAngle(DoElement):
         if self.seg2 is None:
             self.seg2 = self.args['seg2']
 
+        # Only the geometry of the segments is needed
+        self.seg1 = as_segment(self.seg1)
+        self.seg2 = as_segment(self.seg2)
+
         # Default radius
         self.radius = 1.0
         if 'radius' in kwargs.keys():
@@ -117,36 +153,12 @@ class DoAngle(DoElement):
                 self.labelcolor = kwargs['labelcolor']
             else:
                 self.labelcolor = 'w'
+            self.labelsize = kwargs.get('labelsize', 30)
+            self.usetex = kwargs.get('usetex', None)
 
         # TODO: allow caller to specify label position
 
 
-    def define_effects_dict(self):
-        """
-        Define effects dictionary.
-
-        Keys are names of effects, values are methods to implement the effects ('init': method to initialize effect,
-        'run': method to apply effect).
-
-        'init' methods must return nothing. They should store information in fields.
-
-        'run' methods must return the new artist to be drawn.
-
-        """
-
-        # Ask superclass to initialize effects dict
-        super().define_effects_dict()
-
-        # Create effects dict for this class.
-        # Some effects are created and handled by the DoElement superclass, as such effects do not depend on the
-        # nature of the element. Examples are fadein and fadeout. You don't have to worry about them
-        element_effects = {
-            'None': {'init': None, 'run': self.show},
-        }
-
-        # Update dictionary of effects with the effects created above
-        self.effects.update(element_effects)
-
     def show(self, current_frame_in_part):
         """
         Make artist to be drawn.
@@ -206,19 +218,54 @@ class DoAngle(DoElement):
             )
 
         if self.label is not None:
-            retval.append(
-                Text(
-                        x=self.x_label,
-                        y=self.y_label,
-                        text=self.label,
-                        color=self.labelcolor,
-                        usetex=True,
-                        fontsize=30  # TODO
-                )
-            )
+            retval.append(self.make_label_artist())
 
         return retval
 
+    def make_label_artist(self):
+        """
+        Make artist for the label: the cached image of the label, placed so that the label's anchor (left end of
+        its baseline) is at (self.x_label, self.y_label), as a matplotlib Text would be.
+
+        :return: instance of matplotlib.offsetbox.AnnotationBbox.
+
+        """
+
+        # The image is drawn pixel for pixel (no scaling by dpi), so it must be rasterized at the figure's dpi
+        image, (x_anchor, y_anchor) = get_label_cache().get(
+                self.label,
+                self.labelsize,
+                self.labelcolor,
+                self.ax.figure.dpi,
+                rcParams['text.usetex'] if self.usetex is None else self.usetex
+        )
+
+        height, width = image.shape[:2]
+
+        return AnnotationBbox(
+                OffsetImage(image, dpi_cor=False, alpha=self.artist_kwargs.get('alpha')),
+                (self.x_label, self.y_label),
+                box_alignment=(x_anchor / width, y_anchor / height),
+                frameon=False,
+                pad=0
+        )
+
+    def set_alpha(self, alpha):
+        """
+        Change the alpha of the current artists in place (the label's image is inside an AnnotationBbox).
+
+        :param float alpha:
+
+        """
+
+        self.artist_kwargs['alpha'] = alpha
+
+        for a in self.get_artists():
+            if isinstance(a, AnnotationBbox):
+                a.offsetbox.image.set_alpha(alpha)
+            else:
+                a.set_alpha(alpha)
+
     @staticmethod
     def is_right_angle(theta1, theta2):
         """
@@ -0,0 +1,565 @@
+"""
+Batches of elements drawn by a single artist.
+
+A part that draws a grid, a long chain of segments or a tiling would otherwise run one element per segment or polygon,
+each with its own artist (and, for the grow and shrink effects of segments, its own transformations), all of which
+matplotlib draws one by one. When a part is cued (see `Part.cue`), runs of consecutive elements of its script that can
+be drawn together are replaced by a batch: a single element that keeps the geometry, colors, widths and effect state
+of all its elements in NumPy arrays, and draws them with a single collection, updated in place on every frame with a
+few array operations.
+
+* `SegmentBatch`: instances of `DoLineSegment`, drawn with a LineCollection;
+
+* `PolygonBatch`: instances of `DoPolygon`, drawn with a PolyCollection.
+
+A batch draws exactly what its elements would draw, frame by frame. Its elements are drawn in the order of the script,
+where the first of them would be drawn.
+
+"""
+
+import numpy as np
+from matplotlib import lines
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.patches import Polygon
+
+from ganim.easing import get_easing
+from ganim.elements import DoElement
+from ganim.line_elements import DoLineSegment
+from ganim.polygons import DoPolygon
+
+# Minimum number of consecutive compatible elements to be drawn by a batch
+MIN_BATCH_SIZE = 2
+
+
+def get_batch_key(action):
+    """
+    Return what an action must have in common with others to be drawn with them by a single artist (starting with
+    the class of the batch), or None if it cannot be drawn by a batch.
+
+    Only instances of the classes in `BATCH_CLASSES` themselves (not of subclasses, which may draw something else)
+    can be drawn by a batch, unless they were created with `batch=False`.
+
+    :return tuple:
+
+    """
+
+    batch_class = BATCH_CLASSES.get(type(action))
+
+    if batch_class is None or not action.args.get('batch', True):
+        return None
+
+    return (batch_class,) + batch_class.get_batch_key(action)
+
+
+def batch_actions(actions, min_batch_size=MIN_BATCH_SIZE):
+    """
+    Replace runs of consecutive actions that can be drawn together (see `get_batch_key`) by batches.
+
+    :param list actions: in the order of the script.
+
+    :param int min_batch_size: shorter runs are left as they are.
+
+    :return list: actions and batches, in the order of the script.
+
+    """
+
+    batched_actions = []
+    run = []
+    run_key = None
+
+    for action in actions + [None]:
+        key = None if action is None else get_batch_key(action)
+
+        if key is None or key != run_key:
+            if len(run) >= min_batch_size:
+                batched_actions.append(run_key[0](run))
+            else:
+                batched_actions.extend(run)
+
+            run = []
+            run_key = key
+
+        if key is not None:
+            run.append(action)
+        elif action is not None:
+            batched_actions.append(action)
+
+    return batched_actions
+
+
+class ElementBatch(DoElement):
+    """
+    Base class for batches: many elements of the same class, with any of their effects and cues, drawn with a single
+    collection.
+
+    The elements themselves are not cued or drawn: their cues are given to the batch (see `cue_elements`).
+
+    Subclasses compute the geometry and colors of their elements on each frame (`compute_frame`), make the collection
+    (`make_new_artist`) and update it in place (`update_artist`).
+
+    """
+
+    # The effect of a batch is chosen when cueing: 'None' if no element changes over time and they all start on the
+    # same frame, 'batch' otherwise
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+        'batch': {'init': None, 'run': 'batch', 'update': 'update_batch'},
+    }
+
+    __slots__ = (
+        'elements',
+        'start_frames_in_part',
+        'start_frames',
+        'last_effect_frames',
+        'inverse_no_of_frames',
+        'empty_mask',
+        'easings',
+        'fadein_mask',
+        'fadeout_mask',
+    )
+
+    def __init__(self, elements):
+        """
+        :param list elements: with the same batch key (see `get_batch_key`).
+
+        """
+
+        super().__init__(ax=elements[0].ax, stay=elements[0].stay)
+
+        self.elements = list(elements)
+
+        # To be assigned to by cue_elements()
+        self.start_frames_in_part = None
+        self.start_frames = None
+        self.last_effect_frames = None
+        self.inverse_no_of_frames = None
+        self.empty_mask = None
+
+        # Indices of the elements using each easing curve
+        self.easings = {}
+        for i, element in enumerate(elements):
+            self.easings.setdefault(get_easing(element.args['easing']), []).append(i)
+
+        self.fadein_mask = self.get_effect_mask('fadein')
+        self.fadeout_mask = self.get_effect_mask('fadeout')
+
+    @classmethod
+    def get_batch_key(cls, element):
+        """
+        Return what an element must have in common with others to be drawn with them by a batch of this class: the
+        ax it is drawn on, and whether it stays in the figure after the end of the part.
+
+        :return tuple:
+
+        """
+
+        return element.ax, element.stay
+
+    def get_effect_mask(self, effect):
+        """
+        Return which elements have a given effect.
+
+        :param str effect:
+
+        :return np.ndarray: array of bools.
+
+        """
+
+        return np.array([element.args['effect'] == effect for element in self.elements])
+
+    def cue_elements(self, cues):
+        """
+        Assign the cues of the elements, and choose the effect of the batch.
+
+        :param list cues: tuples (start frame in part, end frame in part), one for each element.
+
+        :return tuple[int, int]: the cues of the batch: first start frame and last end frame of the elements that run
+            (the batch ends before it starts if none of them runs).
+
+        """
+
+        start_frames, end_frames = (np.array(frames) for frames in zip(*cues))
+
+        # Elements that end before they start never run (see Part.cue): they are never counted as started
+        self.empty_mask = end_frames < start_frames
+        if self.empty_mask.all():
+            return 0, -1
+
+        self.start_frames_in_part = start_frames
+
+        # Last frame of the effect of each element where it changes, counted from its start frame (elements that do
+        # not change over time only run on their first frame)
+        static = np.array([element.is_static() for element in self.elements])
+        self.last_effect_frames = np.where(static | self.empty_mask, 0, end_frames - start_frames)
+
+        # As in ganim.easing.get_progress, the progress on the k-th frame of an action with n frames is
+        # (k + 1) * (1 / n)
+        self.inverse_no_of_frames = np.array([1 / max(n, 1) for n in (end_frames - start_frames + 1).tolist()])
+
+        start_frames = start_frames[~self.empty_mask]
+        end_frames = end_frames[~self.empty_mask]
+        static = static[~self.empty_mask]
+
+        self.args['effect'] = 'None' if static.all() and (start_frames == start_frames[0]).all() else 'batch'
+
+        return int(start_frames.min()), int(end_frames.max())
+
+    def cue(self, start_frame_in_part, end_frame_in_part, default_ax):
+        """
+        Assign cueing and drawing information (see DoElement.cue). The elements must have been cued first (see
+        `cue_elements`); their start frames become relative to the start of the batch.
+
+        """
+
+        super().cue(start_frame_in_part, end_frame_in_part, default_ax)
+
+        # The batch changes until its last element stops changing
+        last_active_frames = self.start_frames_in_part + self.last_effect_frames
+        self.last_active_frame_in_part = int(last_active_frames[~self.empty_mask].max())
+
+        self.start_frames = self.start_frames_in_part - start_frame_in_part
+
+    def get_profile_name(self):
+        """
+        Return the name under which the work done by this batch is recorded by a profiler.
+
+        :return str:
+
+        """
+
+        return f'{type(self).__name__}:{len(self.elements)} elements'
+
+    def get_frame_progress(self, current_frame_in_part):
+        """
+        Return which elements have started on a frame of the batch, and the (eased) progress of their effects.
+        Elements whose effect has ended keep the progress of their last active frame.
+
+        :param current_frame_in_part: number of the current frame with respect to the start of the batch.
+
+        :return tuple[np.ndarray, np.ndarray]:
+
+        """
+
+        frames = current_frame_in_part - self.start_frames
+
+        progress = (np.clip(frames, 0, self.last_effect_frames) + 1) * self.inverse_no_of_frames
+
+        for easing, indices in self.easings.items():
+            progress[indices] = easing(progress[indices])
+
+        return (frames >= 0) & ~self.empty_mask, progress
+
+    def get_fade_alphas(self, progress):
+        """
+        Return the alpha of each element given by the fadein and fadeout effects (1.0 for elements without them).
+
+        :param np.ndarray progress: as returned by `get_frame_progress`.
+
+        :return np.ndarray:
+
+        """
+
+        alphas = np.ones(len(self.elements))
+        alphas[self.fadein_mask] = progress[self.fadein_mask]
+        alphas[self.fadeout_mask] = 1 - progress[self.fadeout_mask]
+
+        return alphas
+
+    def compute_frame(self, current_frame_in_part):
+        """
+        Compute the geometry and colors of the elements on a frame of the batch, as each element would draw them.
+
+        Must be implemented by subclass.
+
+        :param current_frame_in_part: number of the current frame with respect to the start of the batch.
+
+        """
+
+        raise NotImplementedError
+
+    def update_artist(self):
+        """
+        Change the current artist in place, to the geometry and colors computed by `compute_frame`.
+
+        Must be implemented by subclass.
+
+        """
+
+        raise NotImplementedError
+
+    def show(self, current_frame_in_part):
+        """
+        Make artist with all elements.
+
+        :return: artist to be drawn.
+
+        """
+
+        return self.batch(current_frame_in_part)
+
+    def batch(self, current_frame_in_part):
+        """
+        Make artist with the elements as they are on the current frame.
+
+        :return: artist to be drawn.
+
+        """
+
+        self.compute_frame(current_frame_in_part)
+
+        return self.make_new_artist()
+
+    def update_batch(self, current_frame_in_part):
+        """
+        Change the current artist in place: elements as they are on the current frame.
+
+        """
+
+        self.compute_frame(current_frame_in_part)
+        self.update_artist()
+
+    def draw_element(self):
+        """
+        Remove previous form of the element, draw current form of the element, and update self.artist.
+
+        """
+
+        self.remove_artist()
+        self.artist = self.new_artist
+
+        # The limits of the scene are fixed: the elements must not change them
+        self.ax.add_collection(self.artist, autolim=False)
+
+
+class SegmentBatch(ElementBatch):
+    """
+    Class to draw many line segments (instances of DoLineSegment) with a single LineCollection.
+
+    """
+
+    __slots__ = (
+        'points_a',
+        'points_b',
+        'base_colors',
+        'linewidths',
+        'linestyle',
+        'grow_mask',
+        'shrink_mask',
+        'vertices',
+        'colors',
+        'shared_vertices',
+    )
+
+    def __init__(self, segments):
+        """
+        :param list segments: instances of DoLineSegment, with the same batch key (see `get_batch_key`).
+
+        """
+
+        super().__init__(segments)
+
+        self.points_a = np.array([(segment.xa, segment.ya) for segment in segments], dtype=float)
+        self.points_b = np.array([(segment.xb, segment.yb) for segment in segments], dtype=float)
+
+        # Colors, with the alphas given to the segments replacing those of the colors (as Line2D does)
+        self.base_colors = to_rgba_array([segment.artist_kwargs['color'] for segment in segments])
+        alphas = [segment.artist_kwargs['alpha'] for segment in segments]
+        has_alpha = np.array([alpha is not None for alpha in alphas])
+        self.base_colors[has_alpha, 3] = [alpha for alpha in alphas if alpha is not None]
+
+        self.linewidths = [segment.artist_kwargs['linewidth'] for segment in segments]
+        self.linestyle = segments[0].artist_kwargs['linestyle']
+
+        self.grow_mask = self.get_effect_mask('grow')
+        self.shrink_mask = self.get_effect_mask('shrink')
+
+        # Current end points (one row of two points per segment) and colors of the segments. The paths of the
+        # LineCollection are views of the rows of `vertices`, so changing it changes them (see make_new_artist)
+        self.vertices = np.empty((len(segments), 2, 2))
+        self.colors = self.base_colors.copy()
+        self.shared_vertices = False
+
+    @classmethod
+    def get_batch_key(cls, element):
+        """
+        Segments must also have the same line style.
+
+        """
+
+        return super().get_batch_key(element) + (element.artist_kwargs['linestyle'],)
+
+    def compute_frame(self, current_frame_in_part):
+        """
+        Compute the end points and colors of the segments on a frame of the batch, as each segment would draw them.
+
+        Segments that have not started yet are left out (their end points are NaNs, which are not drawn).
+
+        :param current_frame_in_part: number of the current frame with respect to the start of the batch.
+
+        """
+
+        started, progress = self.get_frame_progress(current_frame_in_part)
+
+        scales = np.ones(len(self.elements))
+        scales[self.grow_mask] = progress[self.grow_mask]
+        scales[self.shrink_mask] = 1 - progress[self.shrink_mask]
+        scales = scales[:, np.newaxis]
+
+        # As the transformations of DoLineSegment.grow: the initial point is fixed
+        self.vertices[:, 0] = self.points_a
+        self.vertices[:, 1] = self.points_b * scales + self.points_a * (1 - scales)
+        self.vertices[~started] = np.nan
+
+        # The alphas of the fade effects replace those of the segments (as in DoElement.fade)
+        fading = self.fadein_mask | self.fadeout_mask
+        self.colors[:, 3] = np.where(fading, self.get_fade_alphas(progress), self.base_colors[:, 3])
+
+    def update_artist(self):
+        """
+        Change the current LineCollection in place.
+
+        """
+
+        if not self.shared_vertices:
+            self.artist.set_segments(self.vertices)
+
+        self.artist.set_color(self.colors)
+        self.artist.stale = True
+
+    def make_new_artist(self):
+        """
+        Compute new form of the element to be drawn: a single LineCollection with all the segments, drawn as Line2D
+        artists with the segments' properties would be.
+
+        :return: new artist to be drawn.
+
+        """
+
+        # A line with the properties shared by the segments gives the properties that Line2D artists would be drawn
+        # with (from the current rcParams)
+        line = lines.Line2D([], [], linestyle=self.linestyle)
+
+        linewidths = [line.get_linewidth() if linewidth is None else linewidth for linewidth in self.linewidths]
+
+        if line.is_dashed():
+            capstyle, joinstyle = line.get_dash_capstyle(), line.get_dash_joinstyle()
+        else:
+            capstyle, joinstyle = line.get_solid_capstyle(), line.get_solid_joinstyle()
+
+        new_segments = LineCollection(
+                self.vertices,
+                colors=self.colors,
+                linewidths=linewidths,
+                linestyles=self.linestyle,
+                capstyle=capstyle,
+                joinstyle=joinstyle,
+                antialiaseds=line.get_antialiased(),
+                zorder=line.get_zorder()
+        )
+
+        # Paths are made from the rows of self.vertices without copies, so updating the segments in place only takes
+        # changing self.vertices (see update_artist)
+        self.shared_vertices = np.shares_memory(new_segments.get_paths()[0].vertices, self.vertices)
+
+        return new_segments
+
+
+class PolygonBatch(ElementBatch):
+    """
+    Class to draw many polygons (instances of DoPolygon), e.g., a tiling or the faces of a mesh, with a single
+    PolyCollection.
+
+    """
+
+    __slots__ = (
+        'polygons',
+        'base_edgecolors',
+        'base_facecolors',
+        'linewidths',
+        'edgecolors',
+        'facecolors',
+    )
+
+    def __init__(self, polygons):
+        """
+        :param list polygons: instances of DoPolygon, with the same batch key (see `get_batch_key`).
+
+        """
+
+        super().__init__(polygons)
+
+        self.polygons = [np.asarray(polygon.vertices, dtype=float) for polygon in polygons]
+
+        # Colors of edges and faces, with their own alphas (see DoPolygon). Faces of polygons that are not filled are
+        # transparent
+        self.base_edgecolors = to_rgba_array([polygon.artist_kwargs['edgecolor'] for polygon in polygons])
+        self.base_facecolors = to_rgba_array([polygon.artist_kwargs['facecolor'] for polygon in polygons])
+        self.base_facecolors[[not polygon.artist_kwargs['fill'] for polygon in polygons], 3] = 0.0
+
+        self.linewidths = [polygon.artist_kwargs['linewidth'] for polygon in polygons]
+
+        # Current colors of edges and faces
+        self.edgecolors = self.base_edgecolors.copy()
+        self.facecolors = self.base_facecolors.copy()
+
+    def compute_frame(self, current_frame_in_part):
+        """
+        Compute the colors of the polygons on a frame of the batch, as each polygon would draw them: the alphas of
+        the fade effects multiply the alphas of edges and faces (see DoPolygon.get_colors).
+
+        Polygons that have not started yet are transparent.
+
+        :param current_frame_in_part: number of the current frame with respect to the start of the batch.
+
+        """
+
+        started, progress = self.get_frame_progress(current_frame_in_part)
+
+        alphas = self.get_fade_alphas(progress)
+        alphas[~started] = 0.0
+
+        np.multiply(self.base_edgecolors[:, 3], alphas, out=self.edgecolors[:, 3])
+        np.multiply(self.base_facecolors[:, 3], alphas, out=self.facecolors[:, 3])
+
+    def update_artist(self):
+        """
+        Change the colors of the current PolyCollection in place.
+
+        """
+
+        self.artist.set_edgecolor(self.edgecolors)
+        self.artist.set_facecolor(self.facecolors)
+
+    def make_new_artist(self):
+        """
+        Compute new form of the element to be drawn: a single PolyCollection with all the polygons, drawn as Polygon
+        artists with the polygons' properties would be.
+
+        :return: new artist to be drawn.
+
+        """
+
+        # A polygon gives the properties that Polygon artists would be drawn with (from the current rcParams)
+        polygon = Polygon(np.zeros((3, 2)))
+
+        linewidths = [polygon.get_linewidth() if linewidth is None else linewidth for linewidth in self.linewidths]
+
+        return PolyCollection(
+                self.polygons,
+                closed=True,
+                facecolors=self.facecolors,
+                edgecolors=self.edgecolors,
+                linewidths=linewidths,
+                capstyle=polygon.get_capstyle(),
+                joinstyle=polygon.get_joinstyle(),
+                antialiaseds=polygon.get_antialiased(),
+                zorder=polygon.get_zorder()
+        )
+
+
+# Classes of batches for each class of element
+BATCH_CLASSES = {
+    DoLineSegment: SegmentBatch,
+    DoPolygon: PolygonBatch,
+}
@@ -0,0 +1,509 @@
+"""
+On-disk caches.
+
+Rendering a long scene is expensive, and usually only a few of its parts change between two renders. Each part gets a
+stable content hash (see `Part.content_hash`); the video segment rendered for a part is kept in a `SegmentCache`
+under a key derived from that hash, so that a new render only re-encodes the parts whose key changed and
+concatenates the cached segments for the others.
+
+Labels typeset with LaTeX are expensive to draw, too. A `LabelCache` rasterizes each distinct label once into an RGBA
+bitmap, which is kept in memory and on disk and reused by all elements, frames and runs.
+
+The cache directory defaults to `$XDG_CACHE_HOME/ganim` (usually `~/.cache/ganim`) and may be set with the
+`GANIM_CACHE_DIR` environment variable.
+
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import types
+from functools import lru_cache
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from matplotlib.transforms import IdentityTransform
+
+from ganim.elements import DoElement
+
+# Default maximum size of the segment cache (in bytes)
+SEGMENT_CACHE_SIZE_DEFAULT = 2 * 1024 ** 3
+
+
+def get_cache_dir(name):
+    """
+    Return the path of a cache directory (e.g., 'segments'), creating it if necessary.
+
+    :param str name:
+
+    :return str:
+
+    """
+
+    base_dir = os.environ.get('GANIM_CACHE_DIR')
+
+    if base_dir is None:
+        xdg_cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+        base_dir = os.path.join(xdg_cache_home, 'ganim')
+
+    directory = os.path.join(base_dir, name)
+    os.makedirs(directory, exist_ok=True)
+
+    return directory
+
+
+def stable_repr(obj):
+    """
+    Return a string representation of an object which does not change from one run (or process) to another, to be
+    hashed.
+
+    Elements are represented by their class and their picklable state (see `DoElement.__getstate__`); containers
+    are represented recursively, with dictionaries and sets sorted; functions and classes by their qualified names.
+
+    Objects without such a representation raise ValueError: functions and classes that cannot be told apart by their
+    names (lambdas, or defined inside functions), and objects whose repr() is the default one (with their address).
+
+    :return str:
+
+    """
+
+    if isinstance(obj, (types.FunctionType, types.BuiltinFunctionType, type)):
+        name = f'{obj.__module__}.{obj.__qualname__}'
+        if '<' in name:
+            raise ValueError(f'{name} has no stable representation (not defined at the top level of a module).')
+        return name
+
+    if isinstance(obj, types.MethodType):
+        return f'{stable_repr(obj.__self__)}.{obj.__func__.__name__}'
+
+    if isinstance(obj, DoElement):
+        cls = type(obj)
+        return f'{cls.__module__}.{cls.__qualname__}({stable_repr(obj.__getstate__())})'
+
+    if isinstance(obj, dict):
+        items = sorted((stable_repr(key), stable_repr(value)) for key, value in obj.items())
+        return '{' + ', '.join(f'{key}: {value}' for key, value in items) + '}'
+
+    if isinstance(obj, (list, tuple)):
+        return type(obj).__name__ + '(' + ', '.join(stable_repr(item) for item in obj) + ')'
+
+    if isinstance(obj, (set, frozenset)):
+        return type(obj).__name__ + '(' + ', '.join(sorted(stable_repr(item) for item in obj)) + ')'
+
+    if isinstance(obj, np.ndarray):
+        return f'ndarray({obj.dtype}, {obj.shape}, {hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest()})'
+
+    if type(obj).__repr__ is object.__repr__:
+        raise ValueError(f'{type(obj).__qualname__} objects have no stable representation.')
+
+    return repr(obj)
+
+
+def content_hash(*objects):
+    """
+    Return a hexadecimal SHA-256 digest of the stable representation of the given objects.
+
+    :return str:
+
+    """
+
+    return hashlib.sha256(stable_repr(objects).encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_code_hash():
+    """
+    Return a hexadecimal SHA-256 digest of the source files of ganim, which changes with any change to the code that
+    draws the elements (the version number is not bumped for each of them).
+
+    The files are only read once per process.
+
+    :return str:
+
+    """
+
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+
+    for directory, subdirectories, filenames in os.walk(package_dir):
+        subdirectories[:] = sorted(subdirectory for subdirectory in subdirectories if subdirectory != '__pycache__')
+
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                path = os.path.join(directory, filename)
+                digest.update(os.path.relpath(path, package_dir).encode())
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+def get_content_hash(*objects):
+    """
+    Return the content hash of the given objects (see `content_hash`), or None if some of them has no stable
+    representation: what depends on them cannot be cached.
+
+    :return str:
+
+    """
+
+    try:
+        return content_hash(*objects)
+    except ValueError:
+        return None
+
+
+class SegmentCache(object):
+
+    def __init__(self, directory=None, max_size=SEGMENT_CACHE_SIZE_DEFAULT):
+        """
+        A cache of rendered video segments, stored as files in a directory, with least-recently-used eviction once
+        the total size of the files goes beyond `max_size`.
+
+        :param str directory: default: the 'segments' cache directory (see `get_cache_dir`).
+
+        :param int max_size: in bytes.
+
+        """
+
+        self.directory = get_cache_dir('segments') if directory is None else directory
+        self.max_size = max_size
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, key, extension):
+        """
+        Return the path where the segment for a key is (or would be) stored.
+
+        :param str key:
+
+        :param str extension: e.g., '.mp4'.
+
+        :return str:
+
+        """
+
+        return os.path.join(self.directory, key + extension)
+
+    def get(self, key, extension):
+        """
+        Look up a segment, marking it as recently used.
+
+        :param str key:
+
+        :param str extension:
+
+        :return str: the path of the cached segment, or None if there is no segment for the key.
+
+        """
+
+        path = self.get_path(key, extension)
+
+        if not os.path.exists(path):
+            return None
+
+        # The modification time of a file is the time it was last used
+        os.utime(path)
+
+        return path
+
+    def put(self, key, extension, filename):
+        """
+        Move a rendered segment into the cache.
+
+        :param str key:
+
+        :param str extension:
+
+        :param str filename: the segment file. It is moved, not copied.
+
+        :return str: the path of the cached segment.
+
+        """
+
+        path = self.get_path(key, extension)
+        shutil.move(filename, path)
+        os.utime(path)
+
+        return path
+
+    def make_temp_dir(self):
+        """
+        Return a new temporary directory inside the cache directory, so that files rendered there can be moved into
+        the cache cheaply.
+
+        :return str:
+
+        """
+
+        return tempfile.mkdtemp(prefix='tmp-', dir=self.directory)
+
+    def evict(self):
+        """
+        Delete least recently used segments until the total size of the cache is at most `max_size`.
+
+        """
+
+        entries = []
+
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            os.remove(path)
+            total_size -= size
+
+
+def rasterize_text(text, fontsize, color, dpi, usetex, padding=2):
+    """
+    Draw a text on a transparent background and return the image.
+
+    :param str text:
+
+    :param int|float fontsize: in points.
+
+    :param color:
+
+    :param int|float dpi:
+
+    :param bool usetex: if True, typeset the text with LaTeX (otherwise, with mathtext).
+
+    :param int padding: transparent margin around the text, in pixels.
+
+    :return tuple[np.ndarray, tuple[float, float]]: an RGBA image (array of shape (height, width, 4)) and the position
+        of the text's anchor (left end of the baseline, which is where matplotlib places a text by default) in
+        pixels, measured from the bottom left corner of the image.
+
+    """
+
+    fig = Figure(figsize=(1, 1), dpi=dpi)
+    fig.patch.set_alpha(0.0)
+    canvas = FigureCanvasAgg(fig)
+
+    # Place the anchor at pixel (0, 0), measure the text, then resize the figure to fit it and move it into view
+    artist = fig.text(0, 0, text, fontsize=fontsize, color=color, usetex=usetex, transform=IdentityTransform())
+    bbox = artist.get_window_extent(canvas.get_renderer())
+
+    width = int(np.ceil(bbox.width)) + 2 * padding
+    height = int(np.ceil(bbox.height)) + 2 * padding
+    anchor = (padding - bbox.x0, padding - bbox.y0)
+
+    fig.set_size_inches(width / dpi, height / dpi)
+    artist.set_position(anchor)
+
+    canvas.draw()
+
+    return np.asarray(canvas.buffer_rgba()).copy(), anchor
+
+
+class LabelCache(object):
+
+    def __init__(self, directory=None):
+        """
+        A cache of labels rasterized by `rasterize_text`, kept in memory and, as .npz files, in a directory.
+
+        :param str directory: default: the 'labels' cache directory (see `get_cache_dir`).
+
+        """
+
+        self.directory = get_cache_dir('labels') if directory is None else directory
+        self.labels = {}
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get(self, text, fontsize, color, dpi, usetex):
+        """
+        Return the image of a label, rasterizing it only if it is neither in memory nor on disk.
+
+        The key includes the current font settings, as the image depends on them.
+
+        :return tuple[np.ndarray, tuple[float, float]]: as returned by `rasterize_text`.
+
+        """
+
+        key = content_hash(
+                text,
+                fontsize,
+                to_rgba(color),
+                dpi,
+                usetex,
+                {
+                    key: rcParams[key]
+                    for key in ('font.family', 'font.serif', 'font.sans-serif', 'mathtext.fontset',
+                                'text.latex.preamble', 'text.antialiased')
+                },
+        )
+
+        if key in self.labels:
+            return self.labels[key]
+
+        path = os.path.join(self.directory, key + '.npz')
+
+        if os.path.exists(path):
+            with np.load(path) as data:
+                label = data['image'], tuple(data['anchor'])
+        else:
+            label = rasterize_text(text, fontsize, color, dpi, usetex)
+
+            # Write to a temporary file first, so that other processes never see a partial file
+            fd, temp_path = tempfile.mkstemp(suffix='.npz', dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, image=label[0], anchor=np.array(label[1]))
+            os.replace(temp_path, path)
+
+        self.labels[key] = label
+
+        return label
+
+
+# Label cache shared by all elements (created when first needed)
+label_cache = None
+
+
+def get_label_cache():
+    """
+    Return the label cache shared by all elements.
+
+    :return LabelCache:
+
+    """
+
+    global label_cache
+
+    if label_cache is None:
+        label_cache = LabelCache()
+
+    return label_cache
+
+
+def get_segment_keys(scene, writer):
+    """
+    Return the cache keys of the segments for the parts of a scene.
+
+    The key of a part combines the part's content hash with everything else that affects its frames: the scene's
+    axes and configuration (limits, FPS, dpi), the matplotlib style, the writer settings, the version and the source
+    code of ganim (see `get_code_hash`: a new version may draw the same elements differently) and, for every earlier
+    part, the hash of the elements which stay in the figure (see `Part.stay_hash`), as they are still drawn in this
+    part.
+
+    Element classes defined outside ganim are only known by name: after changing how they draw, delete the segment
+    cache directory (see `get_cache_dir`).
+
+    Parts without a content hash (see `get_content_hash`), and the parts after one whose staying elements have none,
+    have no key: they are always rendered, and never cached.
+
+    :param ganim.core.Scene scene:
+
+    :param writer: a movie writer, or 'matplotlib' (see `Scene.save`).
+
+    :return list[str]: None for the parts that cannot be cached.
+
+    """
+
+    # Imported here, as ganim imports the core module (and this module with it) when its names are used
+    from ganim import __version__
+
+    settings = content_hash(
+            __version__,
+            get_code_hash(),
+            scene.with_axes,
+            scene.config.get_settings(),
+            {key: value for key, value in rcParams.items() if not key.startswith('backend')},
+            writer if writer == 'matplotlib' else writer.get_settings(),
+    )
+
+    keys = []
+    stay_hashes = []
+
+    for part in scene.parts:
+        if part.content_hash is None or None in stay_hashes:
+            keys.append(None)
+        else:
+            keys.append(content_hash(settings, part.content_hash, stay_hashes))
+        stay_hashes.append(part.stay_hash)
+
+    return keys
+
+
+def save_with_cache(scene, filename, cache, writer, workers=None):
+    """
+    Save a scene to a file, rendering only the parts whose segments are not in the cache.
+
+    :param ganim.core.Scene scene:
+
+    :param str filename:
+
+    :param SegmentCache cache:
+
+    :param writer: a movie writer, or 'matplotlib' (see `Scene.save`).
+
+    :param int workers: if greater than 1, the missing parts are rendered by that many worker processes.
+
+    :return dict: number of parts, number of parts rendered and number of parts taken from the cache.
+
+    """
+
+    # Imported here to avoid a circular import
+    from ganim.parallel import concat_segments, get_context, render_chunk
+
+    scene.cue_parts()
+
+    extension = os.path.splitext(filename)[1]
+    keys = get_segment_keys(scene, writer)
+
+    segment_filenames = [None if key is None else cache.get(key, extension) for key in keys]
+    missing = [part.number for part in scene.parts if segment_filenames[part.number] is None]
+
+    temp_dir = cache.make_temp_dir()
+
+    try:
+        chunks = [
+            (
+                scene.parts[part_no].start_frame_no,
+                scene.parts[part_no].last_frame_no,
+                os.path.join(temp_dir, f'{part_no:05d}{extension}')
+            )
+            for part_no in missing
+        ]
+
+        if workers is not None and workers > 1 and len(chunks) > 1:
+            plan = scene.get_plan()
+            with get_context().Pool(workers) as pool:
+                results = [pool.apply_async(render_chunk, (plan,) + chunk + (writer,)) for chunk in chunks]
+                for result in results:
+                    result.get()
+        else:
+            for first_frame_no, last_frame_no, segment_filename in chunks:
+                scene.render_frames(segment_filename, writer, first_frame_no, last_frame_no)
+
+        for part_no, (_, _, segment_filename) in zip(missing, chunks):
+            if keys[part_no] is None:
+                segment_filenames[part_no] = segment_filename
+            else:
+                segment_filenames[part_no] = cache.put(keys[part_no], extension, segment_filename)
+
+        if len(segment_filenames) == 1:
+            shutil.copyfile(segment_filenames[0], filename)
+        else:
+            concat_segments(segment_filenames, filename)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    cache.evict()
+
+    return {
+        'parts': len(keys),
+        'rendered': len(missing),
+        'cached': len(keys) - len(missing),
+    }
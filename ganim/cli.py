@@ -0,0 +1,679 @@
+"""
+Command line interface.
+
+`ganim render` renders many scenes in one go: the scenes are discovered in a set of modules, queued as jobs by
+priority and rendered by a pool of worker processes. The workers are started once, with matplotlib, ganim and the
+default style already loaded, and render one job after another, so that the labels rasterized by a job (see
+`ganim.cache.LabelCache`) are still in memory for the next ones. Each job has a time limit and a memory limit: a
+worker that exceeds them is killed (and replaced), and its job is reported as failed.
+
+A module provides its scenes as a dictionary `SCENES`, from names to functions that build and return a scene (not
+saved), as in `benchmarks.scenes`. It may also define a dictionary `PRIORITIES`, from scene names to priorities (jobs
+with higher priorities are rendered first; the default is 0). Modules are given as dotted names (importable from the
+current directory) or as paths to .py files.
+
+Each scene is saved to `<output dir>/<scene name>.mp4`. A summary of every job (status, frames, time, throughput and
+peak memory) is printed and written as JSON.
+
+The `farm-worker` command starts a worker of a render farm (see `ganim.farm`).
+
+Usage::
+
+    python -m ganim render MODULE [MODULE ...] [--scenes PATTERN ...] [--priority PATTERN=N ...] [--workers 4]
+        [--output-dir .] [--quality final] [--time-limit SECONDS] [--memory-limit MB] [--summary summary.json]
+        [--no-default-style] [--list]
+
+    GANIM_FARM_AUTHKEY=<key> python -m ganim farm-worker ADDRESS [--connect-timeout SECONDS]
+
+"""
+
+import argparse
+import fnmatch
+import gc
+import heapq
+import importlib
+import importlib.util
+import json
+import os
+import signal
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+
+# How often (in seconds) the time and memory of running jobs are checked
+POLL_INTERVAL = 0.1
+
+# How long (in seconds) idle workers are given to exit when all jobs are done
+EXIT_TIMEOUT = 5
+
+# Status of jobs: rendered, failed with an exception, killed for exceeding their limits, lost with their worker
+STATUS_OK = 'ok'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_MEMORY = 'memory'
+STATUS_CRASHED = 'crashed'
+
+
+def import_scene_module(module):
+    """
+    Import a module of scenes.
+
+    :param str module: dotted name, or path to a .py file.
+
+    :return: the module.
+
+    """
+
+    if not module.endswith('.py'):
+        return importlib.import_module(module)
+
+    path = os.path.abspath(module)
+    name = 'ganim_scenes.' + os.path.splitext(os.path.basename(path))[0]
+
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        if spec is None:
+            raise ImportError(f"Cannot import scenes from '{module}'.")
+
+        # Registered before executing it, as the import system does, so that it is imported only once
+        sys.modules[name] = importlib.util.module_from_spec(spec)
+        try:
+            spec.loader.exec_module(sys.modules[name])
+        except BaseException:
+            del sys.modules[name]
+            raise
+
+    return sys.modules[name]
+
+
+def get_rss(pid):
+    """
+    Return the resident set size of a process, in bytes, or None if it cannot be known (only Linux is supported).
+
+    :param int pid:
+
+    :return int:
+
+    """
+
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Job(object):
+
+    def __init__(self, module, scene, filename, priority=0):
+        """
+        A scene to be rendered and saved by a worker.
+
+        :param str module: the module the scene comes from (as given on the command line).
+
+        :param str scene: name of the scene in the module's `SCENES`.
+
+        :param str filename: movie file.
+
+        :param int priority: jobs with higher priorities are rendered first.
+
+        """
+
+        self.module = module
+        self.scene = scene
+        self.filename = filename
+        self.priority = priority
+
+        # Filled in while the job runs (see Scheduler)
+        self.status = None
+        self.error = None
+        self.worker = None
+        self.start_time = None
+        self.seconds = None
+        self.peak_rss = 0
+        self.stats = None
+
+    @property
+    def name(self):
+        """
+        Name of the job: module and scene.
+
+        """
+
+        return f'{self.module}:{self.scene}'
+
+    def get_summary(self):
+        """
+        Return what is known about this job, for the summary.
+
+        :return dict:
+
+        """
+
+        summary = {
+            'priority': self.priority,
+            'filename': self.filename,
+            'status': self.status,
+            'worker': self.worker,
+            'seconds': self.seconds,
+            'peak_rss_mb': self.peak_rss / 1024 ** 2 if self.peak_rss else None,
+            'frames': None,
+            'fps': None,
+        }
+
+        if self.stats is not None:
+            summary['frames'] = self.stats['frames']
+            summary['fps'] = self.stats['frames'] / self.seconds
+
+        if self.error is not None:
+            summary['error'] = self.error
+
+        return summary
+
+
+def discover_jobs(modules, output_dir, patterns=None, priorities=None):
+    """
+    Return the jobs for the scenes of some modules.
+
+    :param list[str] modules: dotted names or paths to .py files (see `import_scene_module`).
+
+    :param str output_dir: directory of the movie files.
+
+    :param list[str] patterns: only scenes whose names (or the names of their jobs, 'module:scene') match one of
+        these shell-style patterns are rendered (default: all scenes).
+
+    :param list[tuple[str, int]] priorities: (pattern, priority) pairs, overriding the priorities given by the modules;
+        the last pattern matching a scene (or its job) wins.
+
+    :return list[Job]: in the order of the modules and of their scenes.
+
+    """
+
+    jobs = []
+    filenames = {}
+
+    for module in modules:
+        scene_module = import_scene_module(module)
+
+        scenes = getattr(scene_module, 'SCENES', None)
+        if not scenes:
+            raise ValueError(f"Module '{module}' has no scenes (a dictionary SCENES of functions building them).")
+
+        module_priorities = getattr(scene_module, 'PRIORITIES', {})
+
+        for scene in scenes:
+            job = Job(module, scene, os.path.join(output_dir, scene + '.mp4'), module_priorities.get(scene, 0))
+
+            if patterns and not any(fnmatch.fnmatchcase(name, pattern)
+                                    for name in (job.scene, job.name) for pattern in patterns):
+                continue
+
+            for pattern, priority in priorities or []:
+                if fnmatch.fnmatchcase(job.scene, pattern) or fnmatch.fnmatchcase(job.name, pattern):
+                    job.priority = priority
+
+            if job.filename in filenames:
+                raise ValueError(f"Scenes '{filenames[job.filename]}' and '{job.name}' would both be saved to "
+                                 f"'{job.filename}'.")
+            filenames[job.filename] = job.name
+
+            jobs.append(job)
+
+    return jobs
+
+
+def run_job(module, scene_name, filename, quality):
+    """
+    Build a scene and save it. This is executed by the workers.
+
+    The matplotlib style is restored afterwards, so that a scene changing it does not affect the next jobs.
+
+    :return tuple[str, object]: (status, statistics reported by the writer) or (status, error message).
+
+    """
+
+    import matplotlib
+
+    try:
+        with matplotlib.rc_context():
+            stats = import_scene_module(module).SCENES[scene_name]().save(filename, quality=quality)
+    except Exception as e:
+        return STATUS_ERROR, ''.join(traceback.format_exception_only(type(e), e)).strip()
+    finally:
+        # Free the figure and the artists of the scene (kept alive by reference cycles) before the next job
+        gc.collect()
+
+    return STATUS_OK, stats
+
+
+def worker_main(conn, default_style):
+    """
+    Main function of the worker processes: set up matplotlib and ganim once, then run the jobs received through a
+    connection, sending back their results, until None is received.
+
+    :param multiprocessing.connection.Connection conn:
+
+    :param bool default_style: if True, apply ganim's default style (see `ganim.core.reset_default_style`).
+
+    """
+
+    # In a process group of its own, with the processes it starts (e.g., to render a scene in parallel), so that
+    # they are all killed with it (see Scheduler.stop_worker)
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+
+    import ganim.core
+
+    if default_style:
+        ganim.core.reset_default_style()
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        if job is None:
+            break
+
+        conn.send(run_job(*job))
+
+
+class Scheduler(object):
+
+    def __init__(self, jobs, workers, quality='final', time_limit=None, memory_limit=None, default_style=True):
+        """
+        Render jobs with a pool of worker processes, highest priorities first (jobs with the same priority in the order
+        they are given).
+
+        :param list[Job] jobs:
+
+        :param int workers: number of worker processes.
+
+        :param str quality: 'final' | 'draft' (see `ganim.core.Scene.save`).
+
+        :param float time_limit: seconds a job may take (default: no limit).
+
+        :param float memory_limit: MiB that the worker rendering a job may take, not counting its encoder (default:
+            no limit). Memory is sampled every `POLL_INTERVAL` seconds, so short peaks may be missed.
+
+        :param bool default_style: if True, workers apply ganim's default style before rendering.
+
+        """
+
+        self.jobs = jobs
+        self.no_of_workers = max(1, min(workers, len(jobs)))
+        self.quality = quality
+        self.time_limit = time_limit
+        self.memory_limit = None if memory_limit is None else memory_limit * 1024 ** 2
+        self.default_style = default_style
+
+        self.queue = [(-job.priority, i, job) for i, job in enumerate(jobs)]
+        heapq.heapify(self.queue)
+
+        # Worker number -> (process, connection, job being rendered or None)
+        self.workers = {}
+
+        self.start_time = None
+        self.seconds = None
+
+    def start_worker(self, number):
+        """
+        Start a worker process (replacing the previous one with the same number, if any).
+
+        :param int number:
+
+        """
+
+        # Imported here, as ganim.parallel imports ganim.core (and matplotlib with it)
+        from ganim.parallel import get_context
+
+        context = get_context()
+        conn, worker_conn = context.Pipe()
+
+        # Not a daemon: daemonic processes cannot start processes, and jobs may (e.g., by saving a scene with
+        # workers). The workers are stopped by run(), whatever happens
+        process = context.Process(
+                target=worker_main,
+                args=(worker_conn, self.default_style),
+                name=f'ganim-worker-{number}',
+                daemon=False
+        )
+        process.start()
+        worker_conn.close()
+
+        self.workers[number] = (process, conn, None)
+
+    def stop_worker(self, number):
+        """
+        Kill a worker process (e.g., when its job exceeds its limits), with the processes it started.
+
+        :param int number:
+
+        """
+
+        process, conn, job = self.workers.pop(number)
+
+        if hasattr(os, 'killpg'):
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                # The worker has not made its process group yet (or has already exited)
+                pass
+
+        process.kill()
+        process.join()
+        conn.close()
+
+    def assign_jobs(self):
+        """
+        Hand the next jobs in the queue to the idle workers.
+
+        """
+
+        for number, (process, conn, job) in sorted(self.workers.items()):
+            if job is None and self.queue:
+                job = heapq.heappop(self.queue)[2]
+                job.worker = number
+                job.start_time = time.perf_counter()
+
+                conn.send((job.module, job.scene, job.filename, self.quality))
+                self.workers[number] = (process, conn, job)
+
+    def finish_job(self, number, status, result=None):
+        """
+        Record the end of the job of a worker.
+
+        :param int number: worker number.
+
+        :param str status:
+
+        :param result: statistics reported by the writer (if the job succeeded) or an error message.
+
+        """
+
+        process, conn, job = self.workers[number]
+
+        job.seconds = time.perf_counter() - job.start_time
+        job.status = status
+
+        if status == STATUS_OK:
+            job.stats = result
+        else:
+            job.error = result
+
+        self.workers[number] = (process, conn, None)
+
+        print(f'{job.name}: {job.status} in {job.seconds:.1f} s', file=sys.stderr)
+
+    def check_limits(self):
+        """
+        Kill and replace the workers whose jobs exceed their limits.
+
+        """
+
+        now = time.perf_counter()
+
+        for number, (process, conn, job) in list(self.workers.items()):
+            if job is None:
+                continue
+
+            rss = get_rss(process.pid)
+            if rss is not None:
+                job.peak_rss = max(job.peak_rss, rss)
+
+            if self.time_limit is not None and now - job.start_time > self.time_limit:
+                self.finish_job(number, STATUS_TIMEOUT, f'Exceeded the time limit ({self.time_limit} s).')
+            elif self.memory_limit is not None and rss is not None and rss > self.memory_limit:
+                self.finish_job(number, STATUS_MEMORY,
+                                f'Exceeded the memory limit ({self.memory_limit / 1024 ** 2:.0f} MiB).')
+            else:
+                continue
+
+            self.stop_worker(number)
+            self.start_worker(number)
+
+    def run(self):
+        """
+        Render all jobs.
+
+        :return list[Job]: the jobs, with their results.
+
+        """
+
+        self.start_time = time.perf_counter()
+
+        if self.memory_limit is not None and get_rss(os.getpid()) is None:
+            print('Memory of the workers cannot be measured on this system: the memory limit is ignored.',
+                  file=sys.stderr)
+
+        for number in range(self.no_of_workers):
+            self.start_worker(number)
+
+        try:
+            while self.queue or any(job is not None for process, conn, job in self.workers.values()):
+                self.assign_jobs()
+
+                busy = {conn: number for number, (process, conn, job) in self.workers.items() if job is not None}
+
+                for conn in wait(list(busy), timeout=POLL_INTERVAL):
+                    number = busy[conn]
+                    try:
+                        self.finish_job(number, *conn.recv())
+                    except EOFError:
+                        # The worker died without reporting (e.g., killed by the system for lack of memory)
+                        exitcode = self.workers[number][0].exitcode
+                        self.finish_job(number, STATUS_CRASHED, f'The worker exited (exit code: {exitcode}).')
+                        self.stop_worker(number)
+                        self.start_worker(number)
+
+                self.check_limits()
+        finally:
+            # The workers are not daemons, so they must all be stopped here: idle workers are asked to exit (and
+            # killed, with what they started, if they do not), busy ones (e.g., after an interruption) are killed
+            for number, (process, conn, job) in list(self.workers.items()):
+                if job is None:
+                    try:
+                        conn.send(None)
+                    except OSError:
+                        pass
+                    process.join(EXIT_TIMEOUT)
+                self.stop_worker(number)
+
+        self.seconds = time.perf_counter() - self.start_time
+
+        return self.jobs
+
+    def get_summary(self):
+        """
+        Return a summary of the rendering: for every job, its results (see `Job.get_summary`), and the total
+        throughput.
+
+        :return dict:
+
+        """
+
+        frames = sum(job.stats['frames'] for job in self.jobs if job.stats is not None)
+
+        return {
+            'workers': self.no_of_workers,
+            'quality': self.quality,
+            'seconds': self.seconds,
+            'frames': frames,
+            'fps': frames / self.seconds,
+            'jobs': {job.name: job.get_summary() for job in self.jobs},
+            'failed': [job.name for job in self.jobs if job.status != STATUS_OK],
+        }
+
+
+def format_summary(summary):
+    """
+    Return a summary (see `Scheduler.get_summary`) as a table, one line per job.
+
+    :return str:
+
+    """
+
+    width = max(len('job'), *(len(name) for name in summary['jobs']))
+
+    lines = [f"{'job':<{width}}  {'status':<8} {'frames':>7} {'seconds':>8} {'frames/s':>9} {'peak MiB':>9}"]
+
+    for name, job in summary['jobs'].items():
+        lines.append(
+                f"{name:<{width}}  {job['status']:<8} "
+                f"{job['frames'] if job['frames'] is not None else '-':>7} "
+                f"{job['seconds']:>8.1f} "
+                f"{format(job['fps'], '.1f') if job['fps'] is not None else '-':>9} "
+                f"{format(job['peak_rss_mb'], '.0f') if job['peak_rss_mb'] is not None else '-':>9}"
+        )
+
+    lines.append(
+            f"{len(summary['jobs'])} jobs ({len(summary['failed'])} failed), {summary['frames']} frames in "
+            f"{summary['seconds']:.1f} s with {summary['workers']} workers: {summary['fps']:.1f} frames/s"
+    )
+
+    return '\n'.join(lines)
+
+
+def parse_priority(value):
+    """
+    Parse a priority given on the command line as PATTERN=N.
+
+    :return tuple[str, int]:
+
+    """
+
+    pattern, sep, priority = value.rpartition('=')
+
+    try:
+        return pattern, int(priority)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not of the form PATTERN=N.") from None
+
+
+def render(args):
+    """
+    The `render` command: render the scenes of some modules (see the module's docstring).
+
+    :param argparse.Namespace args:
+
+    :return int: exit status: 0 if every job succeeded, 1 otherwise.
+
+    """
+
+    # Modules given by name are looked up in the current directory first, as with `python -m`
+    if '' not in sys.path and os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    jobs = discover_jobs(args.modules, args.output_dir, args.scenes, args.priority)
+
+    if args.list:
+        for job in sorted(jobs, key=lambda job: -job.priority):
+            print(f'{job.priority:>4}  {job.name}  -> {job.filename}')
+        return 0
+
+    if not jobs:
+        print('No scenes to render.', file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    scheduler = Scheduler(
+            jobs,
+            args.workers,
+            quality=args.quality,
+            time_limit=args.time_limit,
+            memory_limit=args.memory_limit,
+            default_style=args.default_style
+    )
+    scheduler.run()
+
+    summary = scheduler.get_summary()
+    print(format_summary(summary), file=sys.stderr)
+
+    summary_filename = args.summary or os.path.join(args.output_dir, 'summary.json')
+    with open(summary_filename, 'w') as f:
+        f.write(json.dumps(summary, indent=2) + '\n')
+
+    return 1 if summary['failed'] else 0
+
+
+def farm_worker(args):
+    """
+    The `farm-worker` command: render chunks of frames for a coordinator (see `ganim.farm`).
+
+    :param argparse.Namespace args:
+
+    :return int: exit status.
+
+    """
+
+    # Imported here, as ganim.farm imports ganim.parallel (and matplotlib with it)
+    from ganim.farm import AUTHKEY_VARIABLE, get_authkey, parse_address, run_worker
+
+    if get_authkey() is None:
+        print(f'The key shared with the coordinator must be in the environment variable {AUTHKEY_VARIABLE}.',
+              file=sys.stderr)
+        return 1
+
+    no_of_chunks = run_worker(parse_address(args.address), connect_timeout=args.connect_timeout)
+    print(f'{no_of_chunks} chunks rendered.', file=sys.stderr)
+
+    return 0
+
+
+def get_parser():
+    """
+    Return the parser of the command line.
+
+    :return argparse.ArgumentParser:
+
+    """
+
+    parser = argparse.ArgumentParser(prog='ganim', description='Geometric animations with matplotlib.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    render_parser = commands.add_parser('render', help='render the scenes of some modules')
+    render_parser.set_defaults(function=render)
+    render_parser.add_argument('modules', nargs='+', metavar='MODULE',
+                               help='dotted name of a module, or path to a .py file, with a dictionary SCENES')
+    render_parser.add_argument('--scenes', nargs='+', metavar='PATTERN',
+                               help='render only the scenes matching these patterns (default: all)')
+    render_parser.add_argument('--priority', type=parse_priority, action='append', metavar='PATTERN=N',
+                               help='priority of the scenes matching a pattern (higher first; default: 0)')
+    render_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                               help='number of worker processes (default: number of CPUs)')
+    render_parser.add_argument('--output-dir', default='.', help='directory of the movie files (default: .)')
+    render_parser.add_argument('--quality', choices=['final', 'draft'], default='final')
+    render_parser.add_argument('--time-limit', type=float, metavar='SECONDS', help='time limit of each job')
+    render_parser.add_argument('--memory-limit', type=float, metavar='MB',
+                               help='memory limit of each job, in MiB (Linux only)')
+    render_parser.add_argument('--summary', metavar='FILE',
+                               help='JSON file for the summary (default: summary.json in the output directory)')
+    render_parser.add_argument('--no-default-style', dest='default_style', action='store_false',
+                               help="do not apply ganim's default style in the workers")
+    render_parser.add_argument('--list', action='store_true', help='list the jobs, by priority, and exit')
+
+    worker_parser = commands.add_parser('farm-worker', help='render chunks of frames for a coordinator (ganim.farm)')
+    worker_parser.set_defaults(function=farm_worker)
+    worker_parser.add_argument('address', help="address of the coordinator: 'host:port', or path of a Unix socket")
+    worker_parser.add_argument('--connect-timeout', type=float, metavar='SECONDS',
+                               help='seconds to keep trying to connect (default: retry forever)')
+
+    return parser
+
+
+def main(argv=None):
+    """
+    Run the command line interface.
+
+    :param list[str] argv: arguments (default: sys.argv[1:]).
+
+    :return int: exit status.
+
+    """
+
+    args = get_parser().parse_args(argv)
+
+    return args.function(args)
@@ -3,9 +3,24 @@ Core module for ganim.
 
 """
 
+from bisect import bisect_right
+from collections.abc import Sequence
+from contextlib import contextmanager
+from io import BytesIO
+from math import ceil, floor
+from time import perf_counter
+
 import matplotlib
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+import matplotlib.image
+import matplotlib.style
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from ganim.batches import ElementBatch, batch_actions
+from ganim.cache import get_content_hash
+from ganim.profiling import Profiler
+from ganim.writers import get_default_writer
 
 # Default values for global variables ####################################
 
@@ -21,8 +36,35 @@ XLIM_DEFAULT = (-1, 17)
 # Limits for y axis (in data coords)
 YLIM_DEFAULT = (-1, 10)
 
+# Quality profiles for saving scenes (see Scene.save): frames per second and dpi of the saved frames (None: keep the
+# scene's) and matplotlib settings, overriding the current ones
+QUALITY_PROFILES = {
+    'final': {
+        'fps': None,
+        'dpi': None,
+        'style': {},
+    },
+    # For checking the choreography of a scene quickly: every element keeps its timing, but there are 5 times fewer
+    # frames, 16 times fewer pixels (with the default style), no antialiasing and no LaTeX
+    'draft': {
+        'fps': 12,
+        'dpi': 50,
+        'style': {
+            'figure.dpi': 50,
+            'lines.antialiased': False,
+            'patch.antialiased': False,
+            'text.antialiased': False,
+            'text.usetex': False,
+            # Close to the look of LaTeX, with fonts that come with matplotlib
+            'mathtext.fontset': 'cm',
+            'font.serif': ['cmr10', 'DejaVu Serif'],
+        },
+    },
+}
+
 # Global variables #######################################################
 
+# Defaults for the configuration of new scenes (see SceneConfig). A scene never reads them again once created
 FPS = FPS_DEFAULT
 INTERVAL = INTERVAL_DEFAULT
 XLIM = XLIM_DEFAULT
@@ -48,6 +90,115 @@ def reset_default_config():
     YLIM = YLIM_DEFAULT
 
 
+class SceneConfig(object):
+
+    def __init__(self, fps=None, interval=None, xlim=None, ylim=None, dpi=None):
+        """
+        The configuration of a scene: everything, besides the matplotlib style, that its frames depend on.
+
+        Each scene has its own configuration (see `Scene`), so that scenes with different settings can be rendered
+        at the same time, e.g., by a pool of threads. Unspecified settings take the values of the global variables
+        (`FPS`, `INTERVAL`, `XLIM` and `YLIM`) when the configuration is created.
+
+        :param int fps: frames per second.
+
+        :param float interval: interval between frames on screen, in milliseconds (default: 1000 / `fps` if `fps` is
+            given, `INTERVAL` otherwise).
+
+        :param xlim: a tuple (xmin, xmax).
+
+        :param ylim: a tuple (ymin, ymax).
+
+        :param dpi: dots per inch of the saved frames (default: None, i.e., rcParams['savefig.dpi'] when saving).
+
+        """
+
+        if interval is None:
+            interval = INTERVAL if fps is None else 1000 / fps
+
+        self.fps = FPS if fps is None else fps
+        self.interval = interval
+        self.xlim = XLIM if xlim is None else xlim
+        self.ylim = YLIM if ylim is None else ylim
+        self.dpi = dpi
+
+    def __repr__(self):
+
+        return f'SceneConfig({", ".join(f"{key}={value!r}" for key, value in self.get_settings().items())})'
+
+    def get_settings(self):
+        """
+        Return the settings of this configuration, from which an identical one can be created (e.g., in another
+        process: see `Scene.get_plan`).
+
+        :return dict:
+
+        """
+
+        return {
+            'fps': self.fps,
+            'interval': self.interval,
+            'xlim': self.xlim,
+            'ylim': self.ylim,
+            'dpi': self.dpi,
+        }
+
+    def get_save_dpi(self, fig):
+        """
+        Return the dpi that frames are saved with: this configuration's, or the one given by rcParams['savefig.dpi']
+        (as when saving with matplotlib).
+
+        :param matplotlib.figure.Figure fig: the scene's figure (for rcParams['savefig.dpi'] == 'figure').
+
+        :return float:
+
+        """
+
+        dpi = matplotlib.rcParams['savefig.dpi'] if self.dpi is None else self.dpi
+        if dpi == 'figure':
+            dpi = fig.dpi
+
+        return dpi
+
+
+@contextmanager
+def quality_config(quality, config):
+    """
+    Context manager that applies a quality profile (see `QUALITY_PROFILES`): it sets the FPS (and interval) and dpi of
+    a scene's configuration and the matplotlib settings of the profile, and restores the previous ones on exit.
+
+    **NOTE:** matplotlib settings are global: while a profile that changes them is applied, scenes rendered
+    concurrently (e.g., by other threads) are drawn with them too. The 'final' profile changes none.
+
+    Parts must be cued again (see `Scene.cue_parts`) for a change of FPS to take effect.
+
+    :param str quality: 'final' | 'draft'.
+
+    :param SceneConfig config:
+
+    """
+
+    try:
+        profile = QUALITY_PROFILES[quality]
+    except KeyError:
+        raise ValueError(f"Unknown quality '{quality}'. Options are: {', '.join(QUALITY_PROFILES)}.") from None
+
+    fps, interval, dpi = config.fps, config.interval, config.dpi
+
+    if profile['fps'] is not None:
+        config.fps = profile['fps']
+        config.interval = 1000 / config.fps
+
+    if profile['dpi'] is not None:
+        config.dpi = profile['dpi']
+
+    try:
+        with matplotlib.rc_context(profile['style']):
+            yield
+    finally:
+        config.fps, config.interval, config.dpi = fps, interval, dpi
+
+
 def reset_default_style():
     """
     Define matplotlib style to be used.
@@ -81,11 +232,12 @@ def reset_default_style():
         'savefig.edgecolor': 'k',
         'savefig.facecolor': 'k',
         'text.color': 'w',
-        'text.latex.preamble': [
+        # Current versions of matplotlib only accept the preamble as a single string
+        'text.latex.preamble': '\n'.join([
             r'\usepackage{xcolor}',
             r'\usepackage{euler}',
             r'\usepackage{amsmath}',
-        ],
+        ]),
         'text.usetex': True,
         'xtick.color': 'y',
         'xtick.direction': 'inout',
@@ -98,25 +250,62 @@ def reset_default_style():
 
 class Scene(object):
 
-    def __init__(self, with_axes=False, xlim=XLIM, ylim=YLIM):
+    def __init__(self, with_axes=False, xlim=None, ylim=None, profile=False, preview=False, config=None):
         """
         Create a new, empty scene.
 
+        By default, the scene is drawn on a figure of its own with an Agg canvas, whatever the backend selected for
+        pyplot: rendering never needs a display, and pyplot is not even imported. To preview the scene in a window,
+        create it with `preview=True`: the figure is then created by pyplot, with its current backend, and is shown by
+        `show` (or by `matplotlib.pyplot.show`).
+
+        The scene keeps its own configuration (see `SceneConfig`) and shares no state with other scenes, so scenes
+        that are not previewed can be rendered concurrently by several threads (as long as the matplotlib style is
+        not changed meanwhile: see `quality_config`).
+
         :param bool with_axes: if True, draw the x and y axes (spines)
 
-        :param xlim: a tuple (xmin, xmax)
+        :param xlim: a tuple (xmin, xmax) (default: the configuration's)
+
+        :param ylim: a tuple (ymin, ymax) (default: the configuration's)
 
-        :param ylim: a tuple (ymin, ymax)
+        :param profile: if True, record timings of the rendering in a new `ganim.profiling.Profiler`, available as
+            `self.profiler`; may also be a Profiler instance (e.g., with tracing or hooks). Timings are only recorded
+            in this process (not by parallel workers).
+
+        :param bool preview: if True, create the figure with pyplot, to be shown on screen (see above).
+
+        :param SceneConfig config: default: a new configuration, with the current values of the global variables. It
+            should not be shared with other scenes, as saving a draft changes it (see `save`).
 
         """
 
-        self.fig, self.ax = plt.subplots()
+        self.config = SceneConfig() if config is None else config
+
+        if xlim is not None:
+            self.config.xlim = xlim
+        if ylim is not None:
+            self.config.ylim = ylim
+
+        # Keep the arguments, so that an identical scene can be rebuilt elsewhere (e.g., in a worker process)
+        self.with_axes = with_axes
+
+        self.preview = preview
+
+        if preview:
+            # Imported here: pyplot selects (and imports) an interactive backend, which takes time and needs a display
+            import matplotlib.pyplot as plt
+            self.fig, self.ax = plt.subplots()
+        else:
+            self.fig = Figure()
+            FigureCanvasAgg(self.fig)
+            self.ax = self.fig.subplots()
 
         if not with_axes:
             self.ax.set_axis_off()
 
-        self.ax.set_xlim(xlim)
-        self.ax.set_ylim(ylim)
+        self.ax.set_xlim(self.config.xlim)
+        self.ax.set_ylim(self.config.ylim)
         self.ax.set_aspect('equal')
 
         self.last_part_no = -1
@@ -124,6 +313,43 @@ class Scene(object):
         self.last_frame_no = -1
         self.rendered_scene = None
 
+        if profile is True:
+            self.profiler = Profiler()
+        elif profile:
+            self.profiler = profile
+        else:
+            self.profiler = None
+
+        # Blitting: should frames be drawn over a cached background? (See blit_tick)
+        self.blit = False
+        # Cached background: everything in the figure except the artists animated in the last frame
+        self.background = None
+        # Artists of the ax drawn in the cached background
+        self.background_artists = set()
+        # Artists drawn over the background in the last frame, as a set and in drawing order
+        self.animated_artists = set()
+        self.animated_order = []
+        # Artists touched in the last frame (from which the animated artists were computed)
+        self.touched_artists = None
+
+    @property
+    def xlim(self):
+        """
+        Limits of the x axis of the scene (see `SceneConfig`).
+
+        """
+
+        return self.config.xlim
+
+    @property
+    def ylim(self):
+        """
+        Limits of the y axis of the scene (see `SceneConfig`).
+
+        """
+
+        return self.config.ylim
+
     def add_part(self, script, duration):
         """
         Add a new part to this scene.
@@ -163,28 +389,31 @@ class Scene(object):
 
         """
 
+        # Cueing may happen more than once (e.g., render, then save in parallel), so always start from scratch
+        self.last_frame_no = -1
+
         for part in self.parts:
             # Update part with start and end frame numbers for the actions in the part's script
-            part.cue(self.last_frame_no)
+            part.cue(self.last_frame_no, self.config.fps)
+
+            for action in part.cued_actions:
+                action.profiler = self.profiler
             # Update last taken frame number of the scene with last frame number of the part we just cued
             self.last_frame_no = part.last_frame_no
 
     def scene_ticker(self):
         """
-        Returns a list of tuples of the form (part number, frame number), one tuple for each frame of the scene.
+        Returns the ticker for the scene: a sequence of tuples of the form (part number, frame number in part),
+        one tuple for each frame of the scene.
 
-        It does this by concatenating the tickers of the parts comprising the scene.
+        The ticker is lazy (see `Ticker`): tuples are computed when needed, so the memory it takes does not depend on
+        the length of the scene.
 
-        :return list[tuple[int, int]]:
+        :return Ticker:
 
         """
 
-        ticker = []
-
-        for part in self.parts:
-            ticker = ticker + part.get_ticker()
-
-        return ticker
+        return Ticker(self.parts, range(self.last_frame_no + 1))
 
     def remove_artists_in_part(self, part_no):
         """
@@ -194,72 +423,706 @@ class Scene(object):
 
         """
         for action in self.parts[part_no].cued_actions:
-            if not action.stay:
+            if not action.stay and action.artist is not None:
+                if self.profiler is not None:
+                    start_time = perf_counter()
+
+                # Removing an artist drawn over the background costs nothing; removing one drawn in the background
+                # makes the background out of date
+                if not self.background_artists.isdisjoint(action.get_artists()):
+                    self.background = None
+                elif not self.animated_artists.isdisjoint(action.get_artists()):
+                    # The animated artists must be computed again
+                    self.touched_artists = None
+
                 action.remove_artist()
 
-    def render(self):
+                if self.profiler is not None:
+                    self.profiler.add('remove_artist', action.get_profile_name(), start_time, perf_counter())
+
+    def animation_manager(self, tick):
         """
-        Render the scene.
+        A driver for the actions to be executed in the scene.
 
-        All parts must be cued first. Then we build an inner function --- the animation_manager --- to be passed to
-        FuncAnimation, which does the actual rendering.
+        Depending on the current value of the ticker (part number, frame number), it calls the appropriate actions.
+
+        :param tuple[int, int] tick: (part number, frame number in part)
+
+        :return list: the artists drawn or changed by the actions executed in this tick.
 
         """
 
-        self.cue_parts()
+        part_no, frame_no_in_part = tick
+
+        current_part = self.parts[part_no]
+
+        touched_artists = []
+
+        # Run actions for this part (only those running on this frame: see Part.get_active_actions)
+        for cued_action in current_part.get_active_actions(frame_no_in_part):
+            # The action may have been specified with a nonzero `start_after` value. In this case, in order
+            # to preserve the timing of the action's effect, we must 'fool' the action to make it think the
+            # current frame value is 0 when it is actually the value of `start_after`. This is done by
+            # subtracting the `start_after` value from the current frame number and calling the action with
+            # the resulting value.
+            frame_no_since_start = frame_no_in_part - cued_action.start_frame_in_part
+            cued_action(frame_no_since_start)
+            touched_artists.extend(cued_action.get_artists())
+
+        # Remove elements from the previous part that should not stay until the end of the scene
+        if part_no > 0 and frame_no_in_part == 0:
+            self.remove_artists_in_part(part_no - 1)
+
+        return touched_artists
+
+    def blit_tick(self, tick):
+        """
+        Process one tick of the ticker (see `animation_manager`) and draw the resulting frame by blitting (see
+        `blit_frame`).
+
+        :param tuple[int, int] tick: (part number, frame number in part)
+
+        :return list: an empty list, as the blitting has already been done (to be used as FuncAnimation's func with
+            `blit=True`).
+
+        """
+
+        touched_artists = self.animation_manager(tick)
+
+        if not self.blit:
+            return touched_artists
+
+        self.blit_frame(touched_artists)
+
+        return []
+
+    def get_draw_order(self):
+        """
+        Return the artists added to the ax (lines, patches, collections, etc.), in the order the ax draws them: by
+        zorder and, for equal zorders, in the order they were added.
+
+        :return list:
+
+        """
+
+        ax = self.ax
+        content = {*ax.lines, *ax.patches, *ax.collections, *ax.artists, *ax.images, *ax.texts, *ax.tables}
+
+        return sorted((artist for artist in ax.get_children() if artist in content), key=lambda a: a.get_zorder())
+
+    def get_animated_artists(self, touched_artists):
+        """
+        Return the artists to be drawn over the background: the artists touched in this tick and, so that all
+        artists are still drawn in the order the ax would draw them, every artist drawn after the first of those (with
+        a higher zorder or added later). Artists that do not change and are drawn before all the touched ones make up
+        the background.
+
+        :param list touched_artists: as returned by `animation_manager`.
+
+        :return list: in drawing order.
+
+        """
+
+        if not touched_artists:
+            return []
+
+        draw_order = self.get_draw_order()
+        positions = {artist: position for position, artist in enumerate(draw_order)}
+
+        touched_positions = [positions[artist] for artist in touched_artists if artist in positions]
+        first_position = min(touched_positions) if touched_positions else len(draw_order)
+
+        # Artists touched in other axes (if any) are drawn last
+        return draw_order[first_position:] + [artist for artist in touched_artists if artist not in positions]
+
+    def blit_frame(self, touched_artists):
+        """
+        Draw the current frame by blitting.
+
+        Only the artists touched in this tick (and those that must be drawn after them: see `get_animated_artists`)
+        are rasterized; everything else (axes, spines, and the elements that do not change, e.g., those without
+        effect, those whose effect has ended and those which stay from earlier parts) comes from a cached background.
+        The background is rebuilt only when it becomes out of date: when an element stops changing (it must then
+        become part of the background), when an element in the background must now be drawn over it or when an
+        element in the background is removed.
+
+        A frame where nothing is touched, right after another such frame, is a hold: the frame is already on the
+        canvas, as the background with nothing over it, so nothing is drawn at all. (The previous frame may have had
+        nothing touched and yet have been drawn, e.g., to rebuild the background after elements were removed.)
+
+        :param list touched_artists: as returned by `animation_manager`.
+
+        :return bool: False for a hold, True otherwise.
+
+        """
+
+        if not touched_artists and self.touched_artists == [] and self.background is not None:
+            if self.profiler is not None:
+                now = perf_counter()
+                self.profiler.add('canvas draw', 'hold', now, now)
+            return False
+
+        # While the same artists are touched (e.g., elements being updated in place), so are the animated ones
+        if self.background is None or touched_artists != self.touched_artists:
+            animated_order = self.get_animated_artists(touched_artists)
+            animated_artists = set(animated_order)
+
+            # Artists drawn over the background in the last frame, which are not animated anymore and are still in
+            # the figure, must now be part of the background
+            for artist in self.animated_artists.difference(animated_artists):
+                if artist.axes is not None:
+                    artist.set_animated(False)
+                    self.background = None
+
+            # Artists in the background that must now be drawn over it must be left out of it
+            if not self.background_artists.isdisjoint(animated_artists):
+                self.background = None
+
+            # Artists which are animated are left out when the whole figure is drawn
+            for artist in animated_order:
+                artist.set_animated(True)
+
+            self.animated_artists = animated_artists
+            self.animated_order = animated_order
+            self.touched_artists = list(touched_artists)
+
+        if self.profiler is not None:
+            start_time = perf_counter()
+            # Name of the event: was the whole figure drawn, or only the animated artists over the background?
+            draw_name = 'full' if self.background is None else 'blit'
+
+        canvas = self.fig.canvas
+
+        if self.background is None:
+            canvas.draw()
+            self.background = canvas.copy_from_bbox(self.fig.bbox)
+            self.background_artists = set(self.get_draw_order()).difference(self.animated_artists)
+        else:
+            canvas.restore_region(self.background)
+
+        for artist in self.animated_order:
+            self.ax.draw_artist(artist)
+
+        canvas.blit(self.fig.bbox)
+
+        if self.profiler is not None:
+            self.profiler.add('canvas draw', draw_name, start_time, perf_counter())
+
+        return True
+
+    def invalidate_background(self, event=None):
+        """
+        Discard the cached background (e.g., when the figure is resized), so that it is rebuilt for the next frame.
+
+        """
+
+        self.background = None
+
+    def seek(self, frame_no):
+        """
+        Bring the figure to the state it would be in right before frame `frame_no` of the scene is drawn, without
+        running through all the previous frames.
+
+        All parts must be cued first. The figure must not contain artists drawn by the actions yet.
+
+        Every action that has already finished by then is drawn once, in its last form; actions still running at
+        `frame_no` are left alone, as the animation manager will draw them when it processes that frame.
+
+        :param int frame_no: frame number, counted from the beginning of the scene.
+
+        """
+
+        part_no, frame_no_in_part = self.scene_ticker()[frame_no]
+
+        for part in self.parts[:part_no + 1]:
+
+            if part.number == part_no:
+                # Current part: only actions that have already finished
+                last_frame_in_part = frame_no_in_part - 1
+            else:
+                last_frame_in_part = part.last_frame_no - part.start_frame_no
+
+            # Elements that do not stay were removed at the beginning of the part following their own, unless that
+            # is exactly the frame we are seeking to (the animation manager will remove them then)
+            removed = part.number < part_no - 1 or (part.number == part_no - 1 and frame_no_in_part > 0)
+
+            finished_actions = [
+                action for action in part.cued_actions
+                if action.start_frame_in_part <= last_frame_in_part
+                and (action.stay or not removed)
+                and (part.number < part_no or action.last_active_frame_in_part <= last_frame_in_part)
+            ]
+
+            # Draw the actions in the order their artists were last added to the ax during normal execution (artists
+            # with the same zorder are drawn in that order): persistent artists that are updated in place were added
+            # on the action's first frame, the others on the last frame the action ran. For actions added on the same
+            # frame, this is the order of the script (sorting is stable)
+            finished_actions.sort(
+                    key=lambda a: a.start_frame_in_part if a.is_updated_in_place()
+                    else min(a.last_active_frame_in_part, last_frame_in_part)
+            )
+
+            for action in finished_actions:
+                action(min(action.last_active_frame_in_part, last_frame_in_part) - action.start_frame_in_part)
+
+    def get_plan(self):
+        """
+        Return a picklable description of this scene, from which an identical scene can be rebuilt with `from_plan`
+        (e.g., in another process).
+
+        The plan contains the arguments used to create the scene (with its configuration), the script and duration of
+        each part and the current matplotlib style.
+
+        :return dict:
+
+        """
+
+        return {
+            'scene': {
+                'with_axes': self.with_axes,
+                'config': self.config.get_settings(),
+            },
+            'parts': [(part.script, part.duration) for part in self.parts],
+            'style': {
+                key: value for key, value in matplotlib.rcParams.items() if not key.startswith('backend')
+            },
+        }
+
+    @classmethod
+    def from_plan(cls, plan):
+        """
+        Build a new scene from a plan returned by `get_plan`.
+
+        **NOTE:** the style stored in the plan is *not* applied here, as it affects the whole process. See
+        `ganim.parallel.apply_plan_style`.
+
+        :param dict plan:
+
+        :return Scene:
+
+        """
+
+        scene = cls(plan['scene']['with_axes'], config=SceneConfig(**plan['scene']['config']))
 
-        ################################################################################################################
+        for script, duration in plan['parts']:
+            scene.add_part(script, duration)
 
-        def animation_manager(tick):
-            """
-            A driver for the actions to be executed in the scene.
+        return scene
 
-            Depending on the current value of the ticker (part number, frame number), it calls the appropriate actions.
+    def show(self):
+        """
+        Show the rendered scene on screen (see `render`). The scene must have been created with `preview=True`.
+
+        """
+
+        if not self.preview:
+            raise ValueError('Only scenes created with preview=True can be shown.')
+
+        import matplotlib.pyplot as plt
+        plt.show()
 
-            :param tuple[int, int] tick: (part number, frame number in part)
+    def render(self, blit=False):
+        """
+        Render the scene.
 
-            """
+        All parts must be cued first. Then we set up FuncAnimation with `animation_manager`, which does the actual
+        rendering.
 
-            nonlocal self
+        :param bool blit: if True, draw each frame over a cached background, redrawing only the artists that change
+            (see `blit_tick`). This speeds up playback on screen; matplotlib's movie writers always redraw the whole
+            figure, so blitting is turned off while saving with them.
 
-            part_no, frame_no_in_part = tick
+        """
 
-            current_part = self.parts[part_no]
+        # Imported here, as it is only needed for previews and for matplotlib's movie writers
+        from matplotlib.animation import FuncAnimation
 
-            # Run actions for this part
-            for cued_action in current_part.cued_actions:
-                if cued_action.start_frame_in_part <= frame_no_in_part <= cued_action.end_frame_in_part:
-                    # The action may have been specified with a nonzero `start_after` value. In this case, in order
-                    # to preserve the timing of the action's effect, we must 'fool' the action to make it think the
-                    # current frame value is 0 when it is actually the value of `start_after`. This is done by
-                    # subtracting the `start_after` value from the current frame number and calling the action with
-                    # the resulting value.
-                    frame_no_since_start = frame_no_in_part - cued_action.start_frame_in_part
-                    cued_action(frame_no_since_start)
+        self.cue_parts()
 
-            # Remove elements from the previous part that should not stay until the end of the scene
-            if part_no > 0 and frame_no_in_part == 0:
-                self.remove_artists_in_part(part_no - 1)
+        self.blit = blit
+        self.invalidate_background()
+        self.animated_artists = set()
 
-        ################################################################################################################
+        if blit:
+            self.fig.canvas.mpl_connect('resize_event', self.invalidate_background)
 
         # Do it!
-        # For some obscure reason, things broke when I passed the ticker as an iterator, so now scene_ticker() is a list
+        # The ticker must have a length, otherwise FuncAnimation saves only its default number of frames (this is
+        # why passing a plain iterator broke things). FuncAnimation must not cache the ticks: that would take memory
+        # proportional to the length of the scene
+        # The empty init_func prevents FuncAnimation from running the first frame twice
         self.rendered_scene = FuncAnimation(
                 self.fig,
-                animation_manager,
-                interval=INTERVAL,
-                frames=self.scene_ticker()
+                self.blit_tick,
+                init_func=lambda: [],
+                interval=self.config.interval,
+                frames=self.scene_ticker(),
+                cache_frame_data=False,
+                blit=blit
         )
 
-    def save(self, filename):
+    def save(self, filename, workers=None, writer=None, cache=None, quality='final', farm=None):
         """
         Save the rendered scene to a file.
 
+        By default, frames are drawn by blitting on the figure's Agg canvas and streamed into ffmpeg, by a background
+        thread if there are several CPUs, so that drawing and encoding overlap (see `write_frames`,
+        `ganim.writers.ThreadedWriter` and `ganim.writers.FFMpegPipeWriter`). With `writer='matplotlib'`, the
+        animation built by `render` (rendered here if it was not) is saved with matplotlib's default movie writer
+        instead; this is also the default for files that are not MP4, MKV or MOV videos (e.g., GIFs).
+
+        If `workers` is greater than 1, the frames of the scene are split into contiguous chunks, which are rendered
+        concurrently by that many worker processes and then concatenated (see `ganim.parallel`).
+
+        If a `cache` is given, each part is rendered to its own segment, which is kept in the cache; parts whose
+        segments are already in the cache are not rendered again (see `ganim.cache`). In this case, `workers` is the
+        number of processes rendering the missing parts.
+
+        If a `farm` is given, the chunks of frames are handed out to the farm's workers, which may run on other
+        machines, and the segments they send back are concatenated (see `ganim.farm`).
+
+        :param str filename:
+
+        :param int workers: number of worker processes (default: render in this process).
+
+        :param writer: an instance of `ganim.writers.ThreadedWriter` or `ganim.writers.FFMpegPipeWriter` (default: see
+            `ganim.writers.get_default_writer`), or 'matplotlib'.
+
+        :param cache: an instance of `ganim.cache.SegmentCache`, or True for the default segment cache.
+
+        :param str quality: 'final' | 'draft' (see `QUALITY_PROFILES`). A draft is rendered with fewer frames per
+            second, a lower dpi, no antialiasing and mathtext instead of LaTeX; the cues of all parts are re-timed for
+            the draft's FPS, so every element keeps its timing (in seconds).
+
+        :param farm: an instance of `ganim.farm.Farm` (not to be combined with `workers` or `cache`).
+
+        :return dict: statistics reported by the writer (number of frames, seconds, frames per second and, for a
+            ThreadedWriter, the occupancy of its queue), or None
+            when saving with matplotlib's writer; when using a cache, the number of parts rendered and taken from the
+            cache; when using a farm, the chunks rendered by each worker and the number of retries.
+
+        """
+
+        if writer is None:
+            writer = get_default_writer(filename)
+
+        if quality != 'final':
+            rendered = self.rendered_scene is not None
+
+            with quality_config(quality, self.config):
+                if writer == 'matplotlib':
+                    # The animation built by render() has the frames of the final quality: replace it (and keep
+                    # matplotlib from warning that it was never drawn)
+                    if rendered:
+                        self.rendered_scene._draw_was_started = True
+                    self.render(self.blit)
+                stats = self.save(filename, workers, writer, cache, farm=farm)
+
+            # Back to the final quality: remove the artists drawn for the draft, re-time the cues
+            self.clear()
+            self.cue_parts()
+            if writer == 'matplotlib':
+                if rendered:
+                    self.render(self.blit)
+                else:
+                    self.rendered_scene = None
+
+            return stats
+
+        if farm is not None:
+            if cache or (workers is not None and workers > 1):
+                raise ValueError('A farm cannot be combined with a cache or with worker processes.')
+            return farm.save(self, filename, writer)
+
+        if cache is not None and cache is not False:
+            # Imported here to avoid a circular import
+            from ganim.cache import SegmentCache, save_with_cache
+            if cache is True:
+                cache = SegmentCache()
+            return save_with_cache(self, filename, cache, writer, workers)
+
+        if workers is not None and workers > 1:
+            # Imported here to avoid a circular import
+            from ganim.parallel import save_in_parallel
+            return save_in_parallel(self, filename, workers, writer)
+
+        if writer == 'matplotlib':
+            # Matplotlib's movie writers redraw the whole figure for every frame, so blitting would be wasted effort
+            if self.rendered_scene is None:
+                self.render()
+            blit, self.blit = self.blit, False
+            try:
+                self.save_animation(self.rendered_scene, filename)
+            finally:
+                self.blit = blit
+            return None
+
+        if self.rendered_scene is not None:
+            # The animation built by render() is not used here: keep matplotlib from warning that it was never drawn
+            self.rendered_scene._draw_was_started = True
+
+        self.cue_parts()
+        return self.write_frames(filename, writer, self.scene_ticker())
+
+    def clear(self):
+        """
+        Remove from the figure every artist drawn by the actions of the scene.
+
+        """
+
+        for part in self.parts:
+            for action in part.cued_actions:
+                action.remove_artist()
+
+        self.invalidate_background()
+        self.animated_artists = set()
+
+    def render_frame(self, frame_no=None, t=None, format='png'):
+        """
+        Render a single frame of the scene, without running through the frames before it.
+
+        The figure is cleared and brought to the state right before the frame (see `seek`): the elements of earlier
+        parts that stay, and the actions of the frame's part that have already finished, are drawn in their last form.
+        The actions running at the frame are then evaluated directly at it. The figure is drawn as when saving the
+        scene (with the dpi of the scene's configuration: see `SceneConfig.get_save_dpi`) and cleared again.
+
+        :param int frame_no: frame number, counted from the beginning of the scene.
+
+        :param float t: time in seconds, counted from the beginning of the scene (instead of `frame_no`): the frame
+            shown at that time is rendered.
+
+        :param str format: 'png' (PNG file contents) | 'rgba' (image).
+
+        :return bytes|np.ndarray: PNG file contents, or an RGBA image (array of shape (height, width, 4)).
+
+        """
+
+        if (frame_no is None) == (t is None):
+            raise ValueError('Exactly one of frame_no and t must be given.')
+
+        if format not in ('png', 'rgba'):
+            raise ValueError(f"Unknown format '{format}'. Options are: png, rgba.")
+
+        self.cue_parts()
+
+        if frame_no is None:
+            frame_no = floor(t * self.config.fps)
+
+        if not 0 <= frame_no <= self.last_frame_no:
+            raise IndexError(f'Frame {frame_no} is out of the scene (frames 0 to {self.last_frame_no}).')
+
+        dpi = self.config.get_save_dpi(self.fig)
+
+        original_dpi = self.fig.dpi
+        self.fig.set_dpi(dpi)
+
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.frame_no = frame_no
+            start_time = perf_counter()
+
+        try:
+            self.clear()
+            self.seek(frame_no)
+            self.animation_manager(self.scene_ticker()[frame_no])
+
+            if profiler is not None:
+                draw_start_time = perf_counter()
+
+            self.fig.canvas.draw()
+
+            if profiler is not None:
+                grab_start_time = perf_counter()
+                profiler.add('canvas draw', 'full', draw_start_time, grab_start_time)
+
+            image = np.asarray(self.fig.canvas.buffer_rgba()).copy()
+        finally:
+            self.clear()
+            self.fig.set_dpi(original_dpi)
+
+        if format == 'png':
+            f = BytesIO()
+            matplotlib.image.imsave(f, image, format='png')
+            result = f.getvalue()
+        else:
+            result = image
+
+        if profiler is not None:
+            end_time = perf_counter()
+            profiler.add('writer', format, grab_start_time, end_time)
+            profiler.add('frame', 'frame', start_time, end_time)
+
+        return result
+
+    def render_frames(self, filename, writer, first_frame_no, last_frame_no):
+        """
+        Save frames `first_frame_no` to `last_frame_no` (inclusive) of the scene to a file.
+
+        The figure is cleared and brought to the state right before the first frame (see `seek`), so frames may be
+        rendered in any order, e.g., one part of the scene at a time. All parts must be cued first.
+
+        :param str filename:
+
+        :param writer: an instance of `ganim.writers.ThreadedWriter` or `ganim.writers.FFMpegPipeWriter`, or
+            'matplotlib'.
+
+        :param int first_frame_no: counted from the beginning of the scene.
+
+        :param int last_frame_no: counted from the beginning of the scene.
+
+        :return dict: statistics reported by the writer, or None for matplotlib's writer.
+
+        """
+
+        self.clear()
+        self.seek(first_frame_no)
+
+        ticker = self.scene_ticker()[first_frame_no:last_frame_no + 1]
+
+        if writer == 'matplotlib':
+            from matplotlib.animation import FuncAnimation
+
+            animation = FuncAnimation(
+                    self.fig,
+                    self.animation_manager,
+                    init_func=lambda: [],
+                    interval=self.config.interval,
+                    frames=ticker,
+                    cache_frame_data=False
+            )
+            self.save_animation(animation, filename, first_frame_no)
+            return None
+
+        return self.write_frames(filename, writer, ticker)
+
+    def save_animation(self, animation, filename, first_frame_no=0):
+        """
+        Save an animation of this scene (e.g., the one built by `render`) with matplotlib's default movie writer.
+
+        If the scene has a profiler, each frame is recorded: the actions run by the animation, then the movie
+        writer's `grab_frame` (as 'writer' events: matplotlib's writers draw the whole figure there, with `savefig`,
+        and hand it to the movie file), and the whole frame.
+
+        :param matplotlib.animation.FuncAnimation animation:
+
         :param str filename:
+
+        :param int first_frame_no: number of the first frame of the animation, counted from the beginning of the
+            scene.
+
+        """
+
+        profiler = self.profiler
+
+        if profiler is None:
+            animation.save(filename, dpi=self.config.dpi)
+            return
+
+        from matplotlib import animation as mpl_animation
+
+        # The writer matplotlib would choose (see matplotlib.animation.Animation.save), so that its grab_frame method
+        # can be timed
+        writer_name = matplotlib.rcParams['animation.writer']
+        if mpl_animation.writers.is_available(writer_name):
+            writer = mpl_animation.writers[writer_name](fps=1000 / self.config.interval)
+        else:
+            writer = mpl_animation.PillowWriter(fps=1000 / self.config.interval)
+
+        grab_frame = writer.grab_frame
+        # The animation runs the actions of a frame and then calls grab_frame: a frame starts when the previous one
+        # was grabbed
+        profiler.frame_no = first_frame_no
+        start_time = perf_counter()
+
+        def profiled_grab_frame(**savefig_kwargs):
+            nonlocal start_time
+
+            grab_start_time = perf_counter()
+            grab_frame(**savefig_kwargs)
+            end_time = perf_counter()
+
+            profiler.add('writer', type(writer).__name__, grab_start_time, end_time)
+            profiler.add('frame', 'frame', start_time, end_time)
+
+            profiler.frame_no += 1
+            start_time = perf_counter()
+
+        writer.grab_frame = profiled_grab_frame
+
+        animation.save(filename, writer=writer, dpi=self.config.dpi)
+
+    def write_frames(self, filename, writer, ticker):
+        """
+        Draw the frames of a ticker by blitting on the figure's canvas (which must be an Agg canvas) and hand each one
+        to a writer, without copying.
+
+        Holds (frames where nothing changes: see `blit_frame`), e.g., the frames of a part where every element is
+        drawn without effect, or after every action has ended, are not drawn again. They are handed to the writer's
+        `write_hold` method if it has one, so that the writer does not have to copy them either; otherwise, the
+        canvas's buffer, still holding the previous frame, is handed to `write_frame`.
+
+        The figure is drawn with the dpi of the scene's configuration (by default, as when saving with matplotlib, the
+        one given by rcParams['savefig.dpi']: see `SceneConfig.get_save_dpi`).
+
+        :param str filename:
+
+        :param writer: an instance of `ganim.writers.ThreadedWriter` or `ganim.writers.FFMpegPipeWriter`.
+
+        :param Ticker ticker: the whole scene's ticker or a slice of it (the figure must be in the state right before
+            its first frame: see `seek`).
+
+        :return dict: statistics reported by the writer.
+
         """
 
-        self.rendered_scene.save(filename)
+        dpi = self.config.get_save_dpi(self.fig)
+
+        original_dpi = self.fig.dpi
+        self.fig.set_dpi(dpi)
+
+        blit = self.blit
+        self.blit = True
+        self.invalidate_background()
+        self.animated_artists = set()
+
+        writer.setup(filename, self.config.fps)
+
+        profiler = self.profiler
+
+        canvas = self.fig.canvas
+        write_frame = writer.write_frame
+        write_hold = getattr(writer, 'write_hold', None)
+        if write_hold is None:
+            def write_hold():
+                write_frame(canvas.buffer_rgba())
+
+        try:
+            if profiler is None:
+                for tick in ticker:
+                    if self.blit_frame(self.animation_manager(tick)):
+                        write_frame(canvas.buffer_rgba())
+                    else:
+                        write_hold()
+            else:
+                for frame_no, tick in zip(ticker.frames, ticker):
+                    profiler.frame_no = frame_no
+                    start_time = perf_counter()
+                    changed = self.blit_frame(self.animation_manager(tick))
+                    write_start_time = perf_counter()
+                    if changed:
+                        write_frame(canvas.buffer_rgba())
+                    else:
+                        write_hold()
+                    end_time = perf_counter()
+                    profiler.add('writer', type(writer).__name__, write_start_time, end_time)
+                    profiler.add('frame', 'frame', start_time, end_time)
+        finally:
+            writer.finish()
+            self.blit = blit
+            self.fig.set_dpi(original_dpi)
+            self.invalidate_background()
+
+        return writer.get_stats()
 
 
 class Part(object):
@@ -283,11 +1146,31 @@ class Part(object):
         self.duration = duration
         self.default_ax = default_ax
 
+        # Content hashes (see ganim.cache), computed before the actions are cued or drawn: one for the whole part,
+        # and one for the elements which stay in the figure after the end of the part. None if some action has no
+        # stable representation (e.g., a lambda as easing): the part is then never cached
+        self.content_hash = get_content_hash(script, duration)
+        self.stay_hash = get_content_hash([action for action in script if action.stay], duration)
+
         self.start_frame_no = None
         self.last_frame_no = None
+        self.fps = None
         self.cued_actions = []
 
-    def cue(self, last_taken_frame_no):
+        # Script with consecutive line segments (or polygons) replaced by batches (see cue)
+        self.batched_script = None
+
+        # Timeline of the cued actions: frame number in part -> indices (in cued_actions) of the actions that start on
+        # that frame, and of the actions that stop on that frame (i.e., whose last frame is the previous one)
+        self.starting_actions = {}
+        self.stopping_actions = {}
+
+        # Actions running on the last frame processed (see get_active_actions)
+        self.active_frame_no = None
+        self.active_indices = set()
+        self.active_actions = []
+
+    def cue(self, last_taken_frame_no, fps):
         """
         Compute cues for this part and for the actions it contains.
 
@@ -299,46 +1182,169 @@ class Part(object):
 
         :param int last_taken_frame_no: number of the last frame of the scene used by the previous part.
 
+        :param int fps: frames per second of the scene.
+
         """
 
         # Picking up after the last frame of previous part
         self.start_frame_no = last_taken_frame_no + 1
+        self.fps = fps
+        self.cued_actions = []
+        self.starting_actions = {}
+        self.stopping_actions = {}
+        self.active_frame_no = None
 
         # When computing the last frame number of this part, ignore the actions' `start_after` and `end_at`
         # attributes, because the part's total duration (as specified with the script) has precedence
-        self.last_frame_no = self.start_frame_no + self.duration * FPS - 1
+        self.last_frame_no = self.start_frame_no + round(self.duration * fps) - 1
 
-        for action in self.script:
+        # Consecutive line segments (or polygons) of the script are drawn together, by a single artist (see
+        # ganim.batches). The batches are made only once, so that cueing again keeps the same elements (and their
+        # artists)
+        if self.batched_script is None:
+            self.batched_script = batch_actions(self.script)
 
-            # Starting frame of this action (beginning of part is zero)
-            if action.args['start_after'] is None:
-                start_frame_in_part = 0
-            else:
-                start_frame_in_part = action.args['start_after'] * FPS
+        for action in self.batched_script:
 
-            # Ending frame of this action (beginning of part is zero)
-            if action.args['end_at'] is None:
-                end_frame_in_part = self.last_frame_no - self.start_frame_no
+            if isinstance(action, ElementBatch):
+                start_frame_in_part, end_frame_in_part = action.cue_elements(
+                        [self.get_action_cues(element) for element in action.elements]
+                )
             else:
-                end_frame_in_part = action.args['end_at'] * FPS - 1
+                start_frame_in_part, end_frame_in_part = self.get_action_cues(action)
+
+            # An action that ends before it starts (e.g., whose end_at comes before its start_after) never runs: it
+            # is left out of the timeline, where it would start after it stopped and never be removed
+            if end_frame_in_part < start_frame_in_part:
+                continue
 
             # Store cued action in list field
             # Again, note we need to pass the default ax, as the action may have been scripted without an explicit ax
             action.cue(start_frame_in_part, end_frame_in_part, self.default_ax)
             self.cued_actions.append(action)
 
+            index = len(self.cued_actions) - 1
+            self.starting_actions.setdefault(start_frame_in_part, []).append(index)
+            # Actions that do not change their elements over time only run on their first frame (see DoElement.cue)
+            self.stopping_actions.setdefault(action.last_active_frame_in_part + 1, []).append(index)
+
+    def get_action_cues(self, action):
+        """
+        Compute the cues of an action of the script: its start and end frames, relative to the beginning of the part.
+
+        :return tuple[int, int]:
+
+        """
+
+        # Starting frame of this action (beginning of part is zero)
+        # Cue times may not fall exactly on a frame: the action runs on the frames between them. Frame numbers are
+        # integers, so that the actions can look up the parameters of their effects, precomputed for each frame, in
+        # arrays
+        if action.args['start_after'] is None:
+            start_frame_in_part = 0
+        else:
+            start_frame_in_part = ceil(action.args['start_after'] * self.fps)
+
+        # Ending frame of this action (beginning of part is zero)
+        if action.args['end_at'] is None:
+            end_frame_in_part = int(self.last_frame_no - self.start_frame_no)
+        else:
+            end_frame_in_part = floor(action.args['end_at'] * self.fps - 1)
+
+        return start_frame_in_part, end_frame_in_part
+
+    def get_active_actions(self, frame_no_in_part):
+        """
+        Return the actions that must run on a given frame of this part, in the order of the script.
+
+        When frames are processed in sequence, the set of active actions is updated incrementally, using the timeline
+        built by `cue`: only the actions starting or stopping on this frame are looked at. Otherwise (first frame
+        processed, or a jump to another frame), the set is rebuilt from scratch.
+
+        :param int frame_no_in_part:
+
+        :return list:
+
+        """
+
+        if self.active_frame_no is not None and frame_no_in_part == self.active_frame_no + 1:
+            starting = self.starting_actions.get(frame_no_in_part, [])
+            stopping = self.stopping_actions.get(frame_no_in_part, [])
+
+            if starting or stopping:
+                self.active_indices.update(starting)
+                self.active_indices.difference_update(stopping)
+                self.active_actions = [self.cued_actions[i] for i in sorted(self.active_indices)]
+        else:
+            self.active_indices = {
+                i for i, action in enumerate(self.cued_actions)
+                if action.start_frame_in_part <= frame_no_in_part <= action.last_active_frame_in_part
+            }
+            self.active_actions = [self.cued_actions[i] for i in sorted(self.active_indices)]
+
+        self.active_frame_no = frame_no_in_part
+
+        return self.active_actions
+
     def get_ticker(self):
         """
         Returns the ticker for this part.
 
-        The ticker is a list of tuples of the form (part number, frame number), to be used by FuncAnimation.
+        The ticker is a sequence of tuples of the form (part number, frame number), to be used by FuncAnimation.
+
+        :return Ticker:
 
-        :return list[tuple[int, int]]:
+        """
+
+        return Ticker([self], range(self.start_frame_no, self.last_frame_no + 1))
+
+
+class Ticker(Sequence):
+
+    def __init__(self, parts, frames):
+        """
+        A lazy ticker: a sequence of tuples of the form (part number, frame number in part), computed on demand from
+        frame numbers counted from the beginning of the scene.
+
+        Slicing a ticker returns another ticker, so chunks of a scene can be rendered without building any lists.
+
+        :param list[Part] parts: cued parts, in order.
+
+        :param range frames: frame numbers (counted from the beginning of the scene) in this ticker.
 
         """
 
-        # Range from 0 to total of frames in part
-        frames = range(self.last_frame_no - self.start_frame_no + 1)
-        part_no = [self.number] * len(frames)
+        self.parts = parts
+        self.frames = frames
+
+        # First frame of each part, to find the part containing a given frame by bisection
+        self.part_starts = [part.start_frame_no for part in parts]
+
+    def __len__(self):
+
+        return len(self.frames)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return Ticker(self.parts, self.frames[index])
+
+        # Raises IndexError when out of range, which also ends iteration
+        frame_no = self.frames[index]
+
+        part = self.parts[bisect_right(self.part_starts, frame_no) - 1]
+
+        return part.number, frame_no - part.start_frame_no
+
+    def __iter__(self):
+
+        if not self.frames:
+            return
+
+        # Walk the parts in order, instead of bisecting for every frame
+        i = bisect_right(self.part_starts, self.frames[0]) - 1
 
-        return list(zip(part_no, frames))
+        for frame_no in self.frames:
+            while i + 1 < len(self.parts) and frame_no >= self.part_starts[i + 1]:
+                i += 1
+            yield self.parts[i].number, frame_no - self.part_starts[i]
@@ -0,0 +1,99 @@
+"""
+Easing curves.
+
+An easing curve maps the progress of an action (from 0 to 1) to the progress of its effect (also from 0 to 1). The
+curves here take and return NumPy arrays, so that the parameters of an effect (alphas, scales...) can be computed for
+all the frames of an action at once, when the action is cued.
+
+An element chooses its curve with the `easing` keyword argument: the name of one of the curves below or any function
+with the same signature (functions must be defined at module level if the scene is to be rendered in parallel, as
+elements are pickled).
+
+"""
+
+import numpy as np
+
+
+def linear(t):
+    """
+    Constant speed.
+
+    :param np.ndarray t: progress of the action, in [0, 1].
+
+    :return np.ndarray: progress of the effect, in [0, 1].
+
+    """
+
+    return t
+
+
+def ease_in(t):
+    """
+    Start slowly, then accelerate (quadratic).
+
+    """
+
+    return t * t
+
+
+def ease_out(t):
+    """
+    Start fast, then decelerate (quadratic).
+
+    """
+
+    return t * (2 - t)
+
+
+def ease_in_out(t):
+    """
+    Start slowly, accelerate, then decelerate (cubic smoothstep).
+
+    """
+
+    return t * t * (3 - 2 * t)
+
+
+EASINGS = {
+    'linear': linear,
+    'ease_in': ease_in,
+    'ease_out': ease_out,
+    'ease_in_out': ease_in_out,
+}
+
+
+def get_easing(easing):
+    """
+    Return an easing curve, given its name (see `EASINGS`) or the curve itself.
+
+    :param str|callable easing:
+
+    :return callable:
+
+    """
+
+    if callable(easing):
+        return easing
+
+    try:
+        return EASINGS[easing]
+    except KeyError:
+        raise ValueError(f"Unknown easing '{easing}'. Options are: {', '.join(EASINGS)}.") from None
+
+
+def get_progress(no_of_frames, easing='linear'):
+    """
+    Return the progress of an effect at each frame of an action: (frame number + 1) / `no_of_frames`, eased.
+
+    :param int no_of_frames:
+
+    :param str|callable easing:
+
+    :return np.ndarray: array of shape (no_of_frames,), ending at 1.
+
+    """
+
+    # Computed as in the original per-frame formula, (frame number + 1) * (1 / no_of_frames), to get the same values
+    progress = np.arange(1, no_of_frames + 1) * (1 / no_of_frames)
+
+    return get_easing(easing)(progress)
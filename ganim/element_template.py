@@ -21,6 +21,40 @@ class DoNewElement(DoElement):
 
     """
 
+    # Effects of this class. Keys are names of effects, values are the NAMES of the methods that implement the effects
+    # ('init': method to initialize effect, 'run': method to apply effect, 'update': method to apply effect in place).
+    #
+    # 'init' methods must return nothing. They should store information in fields.
+    #
+    # 'run' methods must return the new artist to be drawn.
+    #
+    # 'update' methods must change the current artist (self.artist) in place, using its setters, and return nothing.
+    # They are called instead of 'run' on every frame after the first one, so that the artist is created only once.
+    # If an effect has no 'update' method (None), 'run' is called on every frame and a new artist is drawn each time.
+    #
+    # Effects that do not change the element over time must use 'keep' as their 'update' method: the action is then
+    # only run on its first frame, and the element becomes part of the scene's cached background.
+    #
+    # Some effects are registered by the DoElement superclass, as such effects do not depend on the nature of the
+    # element. Examples are fadein and fadeout. You don't have to worry about them: they are added to the effects
+    # below automatically (see DoElement.__init_subclass__)
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+        'effect1': {'init': 'init_effect1', 'run': 'run_effect1', 'update': 'update_effect1'},
+        # TODO: add other effects:
+        # 'name': {'init': 'init_effect1', 'run': 'run_effect1', 'update': 'update_effect1'},
+        # ...
+    }
+
+    # TODO: add default artist properties for this element
+    default_artist_kwargs = {
+        'color': 'w',
+        'linewidth': 2.0,
+    }
+
+    # TODO: declare the names of all fields set by this class (the fields of DoElement are declared there)
+    __slots__ = ()
+
     def __init__(self, *args, **kwargs):
         """
         * **Positional arguments:**
@@ -41,48 +75,12 @@ class DoNewElement(DoElement):
 
         """
 
-        # TODO: add default artist properties for this element
-        self.default_artist_kwargs = {
-            'color': 'w',
-            'linewidth': 2.0,
-        }
-
         # This command must be included: super() will store kwargs in the self.args dictionary and in the
         # self.artist.kwargs dictionary
         super().__init__(*args, **kwargs)
 
         # TODO: add more initialization commands here
 
-    def define_effects_dict(self):
-        """
-        Define effects dictionary.
-
-        Keys are names of effects, values are methods to implement the effects ('init': method to initialize effect,
-        'run': method to apply effect).
-
-        'init' methods must return nothing. They should store information in fields.
-
-        'run' methods must return the new artist to be drawn.
-
-        """
-
-        # Ask superclass to initialize effects dict
-        super().define_effects_dict()
-
-        # Create effects dict for this class.
-        # Some effects are created and handled by the DoElement superclass, as such effects do not depend on the
-        # nature of the element. Examples are fadein and fadeout. You don't have to worry about them
-        element_effects = {
-            'None': {'init': None, 'run': self.show},
-            'effect1': {'init': self.init_effect1, 'run': self.run_effect1},
-            # TODO: add other effects:
-            # 'name': {'init': init_effect1, 'run': run_effect1},
-            # ...
-        }
-
-        # Update dictionary of effects with the effects created above
-        self.effects.update(element_effects)
-
     def show(self, current_frame_in_part):
         """
         Make artist to be drawn.
@@ -139,6 +137,19 @@ class DoNewElement(DoElement):
         # Build and return new artist for this frame
         return self.make_new_artist()
 
+    def update_effect1(self, current_frame_in_part):
+        """
+        Apply this effect to the current artist (self.artist), in place.
+
+        This mirrors `run_effect1`, but instead of building a new artist, it changes the existing one with its setters
+        (e.g., `self.artist.set_transform(...)`, `self.set_alpha(...)`).
+
+        :param current_frame_in_part: number of the current frame with respect to beginning of part.
+
+        """
+
+        # TODO: compute values for this frame, as in run_effect1, and apply them to self.artist
+
     def make_new_artist(self):
         """
         Compute new form of the element to be drawn, using information from self's fields.
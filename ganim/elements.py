@@ -5,6 +5,31 @@ Elements are geometric entities endowed with animation effects.
 
 """
 
+from functools import lru_cache
+from time import perf_counter
+
+from ganim.easing import get_progress
+
+
+@lru_cache(maxsize=None)
+def get_slot_names(cls):
+    """
+    Return the names of the slots declared by a class and its base classes.
+
+    :param type cls:
+
+    :return tuple[str]:
+
+    """
+
+    names = []
+
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get('__slots__', ())
+        names.extend([slots] if isinstance(slots, str) else slots)
+
+    return tuple(name for name in dict.fromkeys(names) if name not in ('__dict__', '__weakref__'))
+
 
 class DoElement(object):
     """
@@ -20,8 +45,70 @@ class DoElement(object):
     animation action more straightforward. One of the advantages of this is that when this method is invoked multiple
     times during the animation, the execution can use the state saved in the instance's fields.
 
+    Effects are registered once per class, in the class attribute `effects` (see below), and the state of each
+    element is kept in `__slots__`: scenes may have tens of thousands of elements, and per-instance dictionaries of
+    effects and fields would take most of their memory and construction time. Subclasses should declare the fields
+    they add in their own `__slots__`.
+
     """
 
+    # Effects of this class. Keys are names of effects, values are dictionaries with the names of the methods that
+    # implement each effect:
+    #
+    # * 'init': method to initialize the effect, called when cueing (or None);
+    #
+    # * 'run': method to make the artist to be drawn for a frame;
+    #
+    # * 'update': method to apply the effect to the current artist in place (or None). Effects that do not change the
+    #   element over time must use 'keep' (see is_static).
+    #
+    # Methods are given by name, so that subclasses may redefine them. The effects of a subclass are added to the
+    # effects inherited from its base classes (see __init_subclass__)
+    effects = {
+        'fadein': {'init': 'init_fadein', 'run': 'fade', 'update': 'update_fade'},
+        'fadeout': {'init': 'init_fadeout', 'run': 'fade', 'update': 'update_fade'},
+    }
+
+    # Default kwargs of the artist (to be defined by subclasses)
+    default_artist_kwargs = {}
+
+    __slots__ = (
+        'args',
+        'ax',
+        'stay',
+        'fade_alphas',
+        'start_frame_in_part',
+        'end_frame_in_part',
+        'total_no_of_frames',
+        'last_active_frame_in_part',
+        'run_method',
+        'update_method',
+        'profiler',
+        'artist',
+        'new_artist',
+        'artist_kwargs',
+        'transform',
+    )
+
+    # Fields left out of the pickled state (see __getstate__)
+    unpicklable_fields = ('ax', 'artist', 'new_artist', 'transform', 'run_method', 'update_method', 'profiler')
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Register the effects of a subclass: those inherited from its base classes, updated with the ones defined in
+        the subclass's own `effects` attribute.
+
+        """
+
+        super().__init_subclass__(**kwargs)
+
+        effects = {}
+        for base in reversed(cls.__mro__[1:]):
+            effects.update(getattr(base, 'effects', {}))
+        effects.update(cls.__dict__.get('effects', {}))
+
+        cls.effects = effects
+
     def __init__(self, *args, **kwargs):
 
         # Defaults for all animation actions
@@ -36,11 +123,21 @@ class DoElement(object):
             'stay': True,
             # Effect to apply to the element
             'effect': 'None',
+            # Should the artist be created only once and then updated in place on every frame? (Only for effects
+            # that provide an 'update' method; otherwise, a new artist is created on every frame.)
+            'persistent': True,
+            # Easing curve of the effect: 'linear' | 'ease_in' | 'ease_out' | 'ease_in_out' | function (see
+            # ganim.easing)
+            'easing': 'linear',
         }
 
         if kwargs:
             self.args.update(kwargs)
 
+        if self.args['effect'] not in self.effects:
+            raise ValueError(f"Unknown effect '{self.args['effect']}' for {type(self).__name__}. Options are: "
+                             f"{', '.join(self.effects)}.")
+
         # Store the ax (possibly None) in a field
         # If None, the default ax will be provided elsewhere
         self.ax = self.args['ax']
@@ -48,19 +145,21 @@ class DoElement(object):
         # Should element stay in the figure beyond the end of the part?
         self.stay = self.args['stay']
 
-        # Dictionary of effects and their respective methods (to be defined by subclasses)
-        self.effects = None
-
-        # Define effects based on subclass implementation
-        self.define_effects_dict()
-
-        # To be used by 'fadein' and 'fadeout' effects
-        self.fade_factor = None
+        # To be used by 'fadein' and 'fadeout' effects: alpha at each frame of the action (computed when cueing)
+        self.fade_alphas = None
 
         # Fields to be assigned to by the cue() method
         self.start_frame_in_part = None
         self.end_frame_in_part = None
         self.total_no_of_frames = None
+        # Last frame where the action changes the element (see is_static)
+        self.last_active_frame_in_part = None
+        # Methods implementing the chosen effect (see effects), resolved once, when cueing
+        self.run_method = None
+        self.update_method = None
+
+        # Profiler (see ganim.profiling), assigned by the scene when cueing, if the scene is being profiled
+        self.profiler = None
 
         # Artist (or list of artists) drawn in the current frame
         self.artist = None
@@ -68,11 +167,14 @@ class DoElement(object):
         # Artist (or list of artists) being constructed, to be drawn in the next frame
         self.new_artist = None
 
+        # Transformation of the artist, for subclasses that use one
+        self.transform = None
+
         # Default kwargs used in drawing any artist
         self.artist_kwargs = {}
 
-        # Add default artist kwargs for specific artist implemented by subclass
-        # (default_artist_kwargs is created by subclass before subclass calls this constructor)
+        # Add default artist kwargs for specific artist implemented by subclass (default_artist_kwargs is a class
+        # attribute of the subclass)
         self.artist_kwargs.update(self.default_artist_kwargs)
 
         # If different values were specified in the call to the constructor, update:
@@ -80,18 +182,42 @@ class DoElement(object):
                 {key: kwargs[key] for key in kwargs if key in self.artist_kwargs}
         )
 
-    def define_effects_dict(self):
+    def __getstate__(self):
         """
-        Define dictionary. Keys are names of effects, values are methods to implement the effects.
+        Return the state of this element to be pickled (e.g., to send it to a worker process), as a dictionary of
+        fields.
 
-        Must be implemented by subclass.
+        Matplotlib objects (ax, artists, transforms) belong to a particular figure, so they are left out, as are the
+        methods resolved for the effect and the profiler (see `unpicklable_fields`). In the process where the element
+        is unpickled, the default ax will be provided when the element is cued, as usual.
 
         """
 
-        self.effects = {
-            'fadein': {'init': self.init_fade, 'run': self.fadein},
-            'fadeout': {'init': self.init_fade, 'run': self.fadeout},
-        }
+        state = {}
+
+        for name in get_slot_names(type(self)):
+            if name not in self.unpicklable_fields and hasattr(self, name):
+                state[name] = getattr(self, name)
+
+        # Instances of subclasses that do not declare __slots__ also have a __dict__
+        state.update(getattr(self, '__dict__', {}))
+
+        state['args'] = dict(self.args, ax=None)
+        state['artist_kwargs'] = {key: value for key, value in self.artist_kwargs.items() if key != 'transform'}
+
+        return state
+
+    def __setstate__(self, state):
+        """
+        Restore the state of an unpickled element, resetting the fields left out by `__getstate__`.
+
+        """
+
+        for name in self.unpicklable_fields:
+            setattr(self, name, None)
+
+        for name, value in state.items():
+            setattr(self, name, value)
 
     def init_effect(self):
         """
@@ -99,9 +225,20 @@ class DoElement(object):
 
         """
 
-        method = self.effects[self.args['effect']]['init']
-        if method is not None:
-            method()
+        method_name = self.effects[self.args['effect']]['init']
+        if method_name is not None:
+            getattr(self, method_name)()
+
+    def resolve_effect(self):
+        """
+        Look up the methods that implement the chosen effect (see `effects`), so that each frame calls them directly.
+
+        """
+
+        effect = self.effects[self.args['effect']]
+
+        self.run_method = getattr(self, effect['run'])
+        self.update_method = getattr(self, effect['update']) if self.is_updated_in_place() else None
 
     def __call__(self, current_frame_in_part):
         """
@@ -115,13 +252,36 @@ class DoElement(object):
         but it matters when in the *part* it will be drawn, because the element has to honor `start_after` and
         `end_at` times, which are specified by the user wrt to the beginning of the part.
 
+        If the element is persistent and the effect provides an 'update' method, the artist is created (by the 'run'
+        method) and added to the ax only the first time; on the following frames, the 'update' method changes it in
+        place. Otherwise, a new artist is created and drawn on every frame.
+
+        The element must have been cued.
+
         :param current_frame_in_part:
 
         """
 
-        method = self.effects[self.args['effect']]['run']
-        self.new_artist = method(current_frame_in_part)
-        self.draw_element()
+        profiler = self.profiler
+        if profiler is not None:
+            start_time = perf_counter()
+
+        if self.update_method is not None and self.artist is not None:
+            self.update_method(current_frame_in_part)
+
+            if profiler is not None:
+                profiler.add('update', self.get_profile_name(), start_time, perf_counter())
+        else:
+            self.new_artist = self.run_method(current_frame_in_part)
+
+            if profiler is not None:
+                run_end_time = perf_counter()
+                profiler.add('run', self.get_profile_name(), start_time, run_end_time)
+
+            self.draw_element()
+
+            if profiler is not None:
+                profiler.add('draw_element', self.get_profile_name(), run_end_time, perf_counter())
 
     def cue(self, start_frame_in_part, end_frame_in_part, default_ax):
         """
@@ -141,9 +301,14 @@ class DoElement(object):
         self.end_frame_in_part = end_frame_in_part
         self.total_no_of_frames = end_frame_in_part - start_frame_in_part + 1
 
+        # An element that does not change over time only needs to be drawn on its first frame: it then stays in the
+        # figure as it is, and becomes part of the scene's cached background (see Scene.blit_frame)
+        self.last_active_frame_in_part = start_frame_in_part if self.is_static() else end_frame_in_part
+
         # Now we have the information needed to initialize the action's effects, which may depend on the total number
         # of frames the action will take
         self.init_effect()
+        self.resolve_effect()
 
         # If the user did not specify an ax where the action should draw, we provide the default ax
         if self.ax is None:
@@ -177,6 +342,9 @@ class DoElement(object):
             else:
                 self.artist.remove()
 
+            # The artist is no longer in the ax: make sure it is not removed twice
+            self.artist = None
+
     def make_new_artist(self):
         """
         Compute new form of the element to be drawn, using information from self's fields.
@@ -189,32 +357,118 @@ class DoElement(object):
 
         raise NotImplementedError
 
-    def init_fade(self):
+    def get_profile_name(self):
+        """
+        Return the name under which the work done by this element is recorded by a profiler: class and effect.
+
+        :return str:
+
         """
-        Compute initial info necessary to implement fadein effect.
 
+        return f"{type(self).__name__}:{self.args['effect']}"
+
+    def get_artists(self):
         """
+        Return the artists currently drawn for this element, as a list (possibly empty).
 
-        # During execution of this action, this factor will be multiplied by the current frame number to give the
-        # current alpha of the segment to be drawn
-        self.fade_factor = 1 / self.total_no_of_frames
+        """
 
-    def fadein(self, current_frame_in_part):
+        if self.artist is None:
+            return []
 
-        # TODO: some elements -- angles, polygons -- have facecolor and edgecolor, with their respective alphas! Deal
-        #  with this. In this case, include alpha info into edgecolor and facecolor. See DoPolygon.
+        if isinstance(self.artist, list):
+            return self.artist
 
-        alpha = (current_frame_in_part + 1) * self.fade_factor
-        self.artist_kwargs['alpha'] = alpha
+        return [self.artist]
 
-        return self.make_new_artist()
+    def set_alpha(self, alpha):
+        """
+        Change the alpha of the current artist(s) in place.
 
-    def fadeout(self, current_frame_in_part):
+        :param float alpha:
 
-        # TODO: some elements -- angles, polygons -- have facecolor and edgecolor, with their respective alphas! Deal
-        #  with this. In this case, include alpha info into edgecolor and facecolor. See DoPolygon.
+        """
 
-        alpha = 1 - (current_frame_in_part + 1) * self.fade_factor
         self.artist_kwargs['alpha'] = alpha
 
+        for a in self.get_artists():
+            a.set_alpha(alpha)
+
+    def is_updated_in_place(self):
+        """
+        Return True if the artist is created on the action's first frame and then updated in place (see `__call__`).
+
+        :return bool:
+
+        """
+
+        return bool(self.args['persistent']) and self.effects[self.args['effect']]['update'] is not None
+
+    def is_static(self):
+        """
+        Return True if the chosen effect does not change the element over time, i.e., if its 'update' method is
+        `keep`. Such an action is only run on its first frame.
+
+        :return bool:
+
+        """
+
+        return self.effects[self.args['effect']]['update'] == 'keep'
+
+    def keep(self, current_frame_in_part):
+        """
+        Update method for effects that do not change the artist over time: leave it as it is.
+
+        """
+
+        pass
+
+    def get_progress(self):
+        """
+        Return the progress of the effect at each frame of the action, from 1 / `total_no_of_frames` to 1, eased by
+        the element's easing curve (see ganim.easing).
+
+        :return np.ndarray:
+
+        """
+
+        return get_progress(self.total_no_of_frames, self.args['easing'])
+
+    def init_fadein(self):
+        """
+        Compute the alpha of the element at each frame of the fadein effect.
+
+        """
+
+        self.fade_alphas = self.get_progress()
+
+    def init_fadeout(self):
+        """
+        Compute the alpha of the element at each frame of the fadeout effect.
+
+        """
+
+        self.fade_alphas = 1 - self.get_progress()
+
+    def fade(self, current_frame_in_part):
+        """
+        Make artist with the alpha of the current frame (fadein and fadeout effects).
+
+        :return: artist to be drawn.
+
+        """
+
+        # TODO: some elements -- angles -- have facecolor and edgecolor, with their respective alphas! Deal with this.
+        #  In this case, include alpha info into edgecolor and facecolor, as DoPolygon does (see DoPolygon.get_colors).
+
+        self.artist_kwargs['alpha'] = self.fade_alphas[current_frame_in_part]
+
         return self.make_new_artist()
+
+    def update_fade(self, current_frame_in_part):
+        """
+        Change the alpha of the current artist in place (fadein and fadeout effects).
+
+        """
+
+        self.set_alpha(self.fade_alphas[current_frame_in_part])
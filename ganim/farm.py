@@ -0,0 +1,488 @@
+"""
+Rendering of scenes by a farm of worker processes, possibly on other machines.
+
+A coordinator (see `Farm`) listens on a TCP address or a Unix socket. Each worker (see `run_worker`) connects to it and
+receives the plan of the scene (see `Scene.get_plan`), from which it rebuilds and cues the scene. The coordinator then
+hands out chunks of frames (see `ganim.parallel.split_frames`) to the workers, one at a time; a worker renders a chunk
+to a segment file (see `Scene.render_frames`) and sends the contents of the file back. Chunks that fail (with an
+error, a lost connection or a timeout) are handed out again, up to a maximum number of attempts. When every chunk has
+been rendered, the segments are concatenated without re-encoding (see `ganim.parallel.concat_segments`).
+
+Messages are exchanged with `multiprocessing.connection`: they are pickled, and connections are authenticated with a
+shared key. Workers execute what the coordinator sends them, so the key must be kept secret, and the farm should
+only be used on a trusted network.
+
+Workers may be started on the same machine by the coordinator (`local_workers`), or anywhere else with::
+
+    GANIM_FARM_AUTHKEY=<key> python -m ganim farm-worker HOST:PORT
+
+"""
+
+import os
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from math import ceil
+from multiprocessing.connection import Client, Listener
+
+from ganim.parallel import apply_plan_style, concat_segments, get_context, split_frames
+
+# Environment variable with the key shared by the coordinator and the workers
+AUTHKEY_VARIABLE = 'GANIM_FARM_AUTHKEY'
+
+# Default length of the chunks of frames handed out to the workers, in seconds of the scene. Each chunk starts with
+# bringing the figure to the state before its first frame (see Scene.seek), so chunks should not be too short
+CHUNK_SECONDS = 5
+
+# How often (in seconds) idle connections check whether the farm has finished, and workers retry connecting
+POLL_INTERVAL = 0.1
+
+
+def get_authkey(authkey=None):
+    """
+    Return the key shared by the coordinator and the workers: the given one, or the one in the environment variable
+    `AUTHKEY_VARIABLE`, or None.
+
+    :param authkey: str or bytes.
+
+    :return bytes:
+
+    """
+
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_VARIABLE)
+
+    if isinstance(authkey, str):
+        authkey = authkey.encode()
+
+    return authkey
+
+
+def parse_address(address):
+    """
+    Parse the address of a coordinator given as a string: 'host:port' for TCP, or a path for a Unix socket.
+
+    :param str address:
+
+    :return: tuple (host, port) or str.
+
+    """
+
+    if os.sep in address or ':' not in address:
+        return address
+
+    host, port = address.rsplit(':', 1)
+
+    return host, int(port)
+
+
+def connect(address, authkey, timeout=None):
+    """
+    Connect to a coordinator, retrying until it accepts connections.
+
+    :param address: tuple (host, port) or path of a Unix socket.
+
+    :param bytes authkey:
+
+    :param float timeout: seconds to keep retrying (default: retry forever).
+
+    :return multiprocessing.connection.Connection:
+
+    """
+
+    start_time = time.perf_counter()
+
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except (ConnectionRefusedError, FileNotFoundError):
+            if timeout is not None and time.perf_counter() - start_time > timeout:
+                raise
+            time.sleep(POLL_INTERVAL)
+
+
+def run_worker(address, authkey=None, connect_timeout=None):
+    """
+    Connect to a coordinator and render the chunks of frames it hands out, until it has no more.
+
+    :param address: tuple (host, port) or path of a Unix socket.
+
+    :param authkey: the coordinator's key (default: see `get_authkey`).
+
+    :param float connect_timeout: seconds to keep trying to connect (default: retry forever).
+
+    :return int: number of chunks rendered.
+
+    """
+
+    # Imported here to avoid a circular import
+    import ganim.core
+
+    conn = connect(address, get_authkey(authkey), connect_timeout)
+    no_of_chunks = 0
+
+    try:
+        conn.send(f'{socket.gethostname()}:{os.getpid()}')
+
+        plan, no_of_frames, extension, writer = conn.recv()
+
+        apply_plan_style(plan)
+
+        scene = ganim.core.Scene.from_plan(plan)
+        scene.cue_parts()
+
+        # The scene must be cued as by the coordinator (e.g., not with another version of ganim)
+        if scene.last_frame_no + 1 != no_of_frames:
+            raise ValueError(f'The scene has {scene.last_frame_no + 1} frames here, {no_of_frames} for the '
+                             f'coordinator.')
+
+        while True:
+            chunk = conn.recv()
+            if chunk is None:
+                break
+
+            index, first_frame_no, last_frame_no = chunk
+
+            fd, filename = tempfile.mkstemp(prefix='ganim-', suffix=extension)
+            os.close(fd)
+
+            try:
+                stats = scene.render_frames(filename, writer, first_frame_no, last_frame_no)
+                with open(filename, 'rb') as f:
+                    segment = f.read()
+            except Exception as e:
+                conn.send(('error', index, f'{type(e).__name__}: {e}'))
+                continue
+            finally:
+                os.remove(filename)
+
+            conn.send(('segment', index, segment, stats))
+            no_of_chunks += 1
+    except (EOFError, OSError):
+        # The coordinator is gone
+        pass
+    finally:
+        conn.close()
+
+    return no_of_chunks
+
+
+class Farm(object):
+
+    def __init__(self, address=('localhost', 0), authkey=None, local_workers=0, chunk_frames=None, max_attempts=3,
+                 chunk_timeout=None, idle_timeout=None):
+        """
+        A coordinator, handing out the chunks of frames of a scene to workers (see the module's docstring).
+
+        :param address: tuple (host, port) or path of a Unix socket to listen on. With port 0 (the default), a free
+            port is chosen: see `address` once the farm is listening (e.g., in `on_listen`).
+
+        :param authkey: key shared with the workers, str or bytes (default: see `get_authkey`; if not set either, a
+            random key, which only local workers know).
+
+        :param int local_workers: number of workers started on this machine, in processes of their own.
+
+        :param int chunk_frames: frames per chunk (default: `CHUNK_SECONDS` seconds of the scene).
+
+        :param int max_attempts: times a chunk may fail (with an error, a lost connection or a timeout) before the save
+            fails.
+
+        :param float chunk_timeout: seconds a worker may take to render a chunk before it is handed out again
+            (default: no limit).
+
+        :param float idle_timeout: seconds the farm may go without progress (no worker connecting and no chunk
+            rendered) before the save fails (default: no limit). Whatever this is, the save fails if chunks are left
+            while no worker is connected, after some worker has connected or local workers were started, and every
+            local worker has exited.
+
+        """
+
+        self.address = address
+        self.authkey = get_authkey(authkey) or os.urandom(32)
+        self.local_workers = local_workers
+        self.chunk_frames = chunk_frames
+        self.max_attempts = max_attempts
+        self.chunk_timeout = chunk_timeout
+        self.idle_timeout = idle_timeout
+
+        # Called with the farm once it listens (e.g., to start remote workers)
+        self.on_listen = None
+
+        # State of the current save
+        self.listener = None
+        self.chunks = None
+        self.pending_chunks = None
+        self.attempts = None
+        self.segment_filenames = None
+        self.extension = None
+        self.segment_dir = None
+        self.message = None
+        self.error = None
+        self.finished = None
+        self.lock = threading.Lock()
+        # Number of workers connected now, whether any has ever connected, and when progress was last made
+        self.connected_workers = 0
+        self.any_worker_connected = False
+        self.progress_time = None
+        self.workers = {}
+
+    def get_chunks(self, scene):
+        """
+        Split the frames of a cued scene into chunks.
+
+        :return list[tuple[int, int]]: (first frame number, last frame number) of each chunk.
+
+        """
+
+        no_of_frames = scene.last_frame_no + 1
+        chunk_frames = CHUNK_SECONDS * scene.config.fps if self.chunk_frames is None else self.chunk_frames
+
+        return split_frames(no_of_frames, ceil(no_of_frames / chunk_frames))
+
+    def retry_chunk(self, index, reason):
+        """
+        Hand a chunk out again, or make the save fail if it has been handed out `max_attempts` times.
+
+        :param int index:
+
+        :param str reason: why the last attempt failed.
+
+        """
+
+        with self.lock:
+            self.attempts[index] += 1
+
+            if self.attempts[index] >= self.max_attempts:
+                self.error = f'Chunk {index} failed {self.attempts[index]} times; last time: {reason}'
+                self.finished.set()
+            else:
+                self.pending_chunks.put(index)
+
+    def store_segment(self, index, segment, worker):
+        """
+        Write the segment rendered for a chunk.
+
+        """
+
+        filename = os.path.join(self.segment_dir, f'{index:05d}{self.extension}')
+        with open(filename, 'wb') as f:
+            f.write(segment)
+
+        with self.lock:
+            self.segment_filenames[index] = filename
+            self.workers[worker] = self.workers.get(worker, 0) + 1
+            self.progress_time = time.perf_counter()
+
+            if all(self.segment_filenames):
+                self.finished.set()
+
+    def serve_worker(self, conn):
+        """
+        Hand out chunks to a connected worker until the farm has finished (executed by a thread for each worker).
+        The worker has already been counted as connected (see `accept_workers`).
+
+        :param multiprocessing.connection.Connection conn:
+
+        """
+
+        index = None
+
+        try:
+            worker = conn.recv()
+            conn.send(self.message)
+
+            while not self.finished.is_set():
+                try:
+                    index = self.pending_chunks.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+
+                conn.send((index,) + self.chunks[index])
+
+                if self.chunk_timeout is not None and not conn.poll(self.chunk_timeout):
+                    # The worker cannot be trusted with more chunks
+                    self.retry_chunk(index, f'{worker} timed out')
+                    index = None
+                    break
+
+                reply = conn.recv()
+                if reply[0] == 'segment':
+                    self.store_segment(index, reply[2], worker)
+                else:
+                    self.retry_chunk(index, f'{worker}: {reply[2]}')
+                index = None
+
+            conn.send(None)
+        except (EOFError, OSError):
+            # Lost connection: the chunk being rendered (if any) is handed out again
+            if index is not None:
+                self.retry_chunk(index, 'lost connection to the worker')
+        finally:
+            conn.close()
+
+            with self.lock:
+                self.connected_workers -= 1
+
+    def accept_workers(self, threads):
+        """
+        Accept connections from workers until the farm has finished, serving each by a new thread.
+
+        :param list threads: the new threads are appended to it.
+
+        """
+
+        listener = self.listener
+
+        while not self.finished.is_set():
+            try:
+                conn = listener.accept()
+            except OSError:
+                # Failed authentication (or a connection closed right away)
+                continue
+
+            if self.finished.is_set():
+                conn.close()
+                break
+
+            # Counted before its thread starts, so that wait_for_chunks never sees no worker while one is connecting
+            with self.lock:
+                self.connected_workers += 1
+                self.any_worker_connected = True
+                self.progress_time = time.perf_counter()
+
+            thread = threading.Thread(target=self.serve_worker, args=(conn,), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+    def wait_for_chunks(self, processes):
+        """
+        Wait until every chunk has been rendered, or the save has failed: a chunk failed too many times, no worker is
+        left to render the chunks (see `__init__`), or the farm has been idle for too long.
+
+        :param list processes: the local workers.
+
+        """
+
+        while not self.finished.wait(POLL_INTERVAL):
+            with self.lock:
+                # The farm may have finished meanwhile (it finishes with the lock held)
+                if self.finished.is_set():
+                    break
+
+                if (self.connected_workers == 0 and (self.any_worker_connected or processes)
+                        and not any(process.is_alive() for process in processes)):
+                    self.error = 'No worker is left to render the remaining chunks.'
+                elif self.idle_timeout is not None and time.perf_counter() - self.progress_time > self.idle_timeout:
+                    self.error = f'No progress in {self.idle_timeout} s (idle timeout).'
+                else:
+                    continue
+
+                self.finished.set()
+
+    def save(self, scene, filename, writer):
+        """
+        Save a scene to a file, rendered by the workers of the farm.
+
+        :param ganim.core.Scene scene:
+
+        :param str filename:
+
+        :param writer: a movie writer (each worker gets a copy), or 'matplotlib'.
+
+        :return dict: number of frames, total seconds and frames per second achieved by all workers together, number
+            of chunks and of retries, and chunks rendered by each worker (by 'host:pid'). None for matplotlib's writer.
+
+        """
+
+        start_time = time.perf_counter()
+
+        scene.cue_parts()
+        no_of_frames = scene.last_frame_no + 1
+
+        self.chunks = self.get_chunks(scene)
+        self.pending_chunks = queue.Queue()
+        for index in range(len(self.chunks)):
+            self.pending_chunks.put(index)
+
+        self.attempts = [0] * len(self.chunks)
+        self.segment_filenames = [None] * len(self.chunks)
+        self.extension = os.path.splitext(filename)[1]
+        self.message = (scene.get_plan(), no_of_frames, self.extension, writer)
+        self.error = None
+        self.finished = threading.Event()
+        self.workers = {}
+        self.connected_workers = 0
+        self.any_worker_connected = False
+        self.progress_time = time.perf_counter()
+
+        self.segment_dir = tempfile.mkdtemp(prefix='ganim-', dir=os.path.dirname(os.path.abspath(filename)))
+        self.listener = Listener(self.address, authkey=self.authkey)
+        address = self.address
+        self.address = self.listener.address
+
+        threads = []
+        processes = []
+
+        try:
+            # Local workers are started before any thread (they may be forked), and connect once the farm accepts
+            context = get_context()
+            for i in range(self.local_workers):
+                process = context.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+                process.start()
+                processes.append(process)
+
+            accept_thread = threading.Thread(target=self.accept_workers, args=(threads,), daemon=True)
+            accept_thread.start()
+
+            if self.on_listen is not None:
+                self.on_listen(self)
+
+            self.wait_for_chunks(processes)
+
+            # Wake the accepting thread up with a connection of our own, then close the listener
+            listener, self.listener = self.listener, None
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            accept_thread.join()
+            listener.close()
+
+            if self.error is not None:
+                # Workers still rendering other chunks are not waited for (local ones are killed below)
+                raise RuntimeError(self.error)
+
+            for thread in threads:
+                thread.join()
+
+            concat_segments(self.segment_filenames, filename)
+        finally:
+            for process in processes:
+                process.join(POLL_INTERVAL * 10)
+                if process.is_alive():
+                    process.kill()
+                    process.join()
+
+            if self.listener is not None:
+                self.listener.close()
+                self.listener = None
+
+            self.address = address
+            shutil.rmtree(self.segment_dir, ignore_errors=True)
+
+        if writer == 'matplotlib':
+            return None
+
+        seconds = time.perf_counter() - start_time
+
+        return {
+            'frames': no_of_frames,
+            'seconds': seconds,
+            'fps': no_of_frames / seconds,
+            'chunks': len(self.chunks),
+            'retries': sum(self.attempts),
+            'workers': dict(self.workers),
+        }
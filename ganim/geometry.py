@@ -0,0 +1,402 @@
+"""
+Geometry primitives.
+
+Points, segments and polylines, for computations (angles, lengths, intersections, projections) that do not need
+anything to be drawn. They are much lighter than elements: `Point` and `Segment` only hold their coordinates (in
+slots), and `SegmentArray` and `Polyline` hold theirs in NumPy arrays, with vectorized operations on all their segments
+at once (e.g., the outline and the sides of a `DoPolygon`).
+
+"""
+
+from collections.abc import Sequence
+from math import atan2, degrees, hypot
+
+import numpy as np
+
+
+class Point(object):
+    """
+    A point in the plane. It may be unpacked as a tuple: `x, y = point`.
+
+    """
+
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+
+        self.x = x
+        self.y = y
+
+    def __iter__(self):
+
+        yield self.x
+        yield self.y
+
+    def __len__(self):
+
+        return 2
+
+    def __getitem__(self, index):
+
+        return (self.x, self.y)[index]
+
+    def __eq__(self, other):
+
+        try:
+            return tuple(self) == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    def __hash__(self):
+
+        return hash((self.x, self.y))
+
+    def __repr__(self):
+
+        return f'Point({self.x!r}, {self.y!r})'
+
+    def distance(self, other):
+        """
+        Return the distance to another point.
+
+        :param Point|tuple other:
+
+        :return float:
+
+        """
+
+        x, y = other
+
+        return hypot(x - self.x, y - self.y)
+
+
+class Segment(object):
+    """
+    A line segment, from point a to point b.
+
+    """
+
+    __slots__ = ('xa', 'ya', 'xb', 'yb')
+
+    def __init__(self, point_a, point_b):
+        """
+        :param tuple point_a: (x0, y0), initial point.
+
+        :param tuple point_b: (x1, y1), final point.
+
+        """
+
+        self.xa, self.ya = point_a
+        self.xb, self.yb = point_b
+
+    def __repr__(self):
+
+        return f'Segment(({self.xa!r}, {self.ya!r}), ({self.xb!r}, {self.yb!r}))'
+
+    def __eq__(self, other):
+
+        if not isinstance(other, Segment):
+            return NotImplemented
+
+        return (self.xa, self.ya, self.xb, self.yb) == (other.xa, other.ya, other.xb, other.yb)
+
+    def __hash__(self):
+
+        return hash((self.xa, self.ya, self.xb, self.yb))
+
+    @property
+    def point_a(self):
+
+        return Point(self.xa, self.ya)
+
+    @property
+    def point_b(self):
+
+        return Point(self.xb, self.yb)
+
+    def angle(self):
+        """
+        Return angle (in degrees) of this segment wrt to x axis.
+
+        :return: angle measured counterclockwise, in degrees, as float, in interval [0.0; 360.0).
+
+        """
+
+        # Vertical segment
+        if self.xa == self.xb:
+            if self.ya < self.yb:
+                return 90.0
+            else:
+                return 270.0
+
+        # Nonvertical segment
+        angle = degrees(atan2(self.yb - self.ya, self.xb - self.xa))
+
+        if angle < 0:
+            angle = 360.0 + angle
+
+        return angle
+
+    def length(self):
+        """
+        Return the length of this segment.
+
+        :return float:
+
+        """
+
+        return hypot(self.xb - self.xa, self.yb - self.ya)
+
+    def intersection(self, other, extend=False):
+        """
+        Return the point where this segment meets another one.
+
+        :param Segment other:
+
+        :param bool extend: if True, the segments are extended to lines, i.e., the intersection point may lie outside
+            them.
+
+        :return Point: None if the segments (or the lines) do not meet, or if they are parallel.
+
+        """
+
+        rx, ry = self.xb - self.xa, self.yb - self.ya
+        sx, sy = other.xb - other.xa, other.yb - other.ya
+
+        cross = rx * sy - ry * sx
+        if cross == 0:
+            return None
+
+        qx, qy = other.xa - self.xa, other.ya - self.ya
+
+        # Parameters of the intersection point along each segment (0 at point a, 1 at point b)
+        t = (qx * sy - qy * sx) / cross
+        u = (qx * ry - qy * rx) / cross
+
+        if not extend and not (0 <= t <= 1 and 0 <= u <= 1):
+            return None
+
+        return Point(self.xa + t * rx, self.ya + t * ry)
+
+    def projection(self, point):
+        """
+        Return the orthogonal projection of a point on the line that contains this segment.
+
+        :param Point|tuple point:
+
+        :return Point:
+
+        """
+
+        x, y = point
+        rx, ry = self.xb - self.xa, self.yb - self.ya
+
+        t = ((x - self.xa) * rx + (y - self.ya) * ry) / (rx * rx + ry * ry)
+
+        return Point(self.xa + t * rx, self.ya + t * ry)
+
+
+def as_segment(obj):
+    """
+    Return the geometry of a segment given as a `Segment`, as an element with a `get_segment` method (e.g.,
+    `ganim.line_elements.DoLineSegment`) or as a pair of points.
+
+    :return Segment:
+
+    """
+
+    if isinstance(obj, Segment):
+        return obj
+
+    get_segment = getattr(obj, 'get_segment', None)
+    if get_segment is not None:
+        return get_segment()
+
+    point_a, point_b = obj
+
+    return Segment(point_a, point_b)
+
+
+class SegmentArray(Sequence):
+    """
+    A sequence of segments, stored as two arrays of points: initial points and final points.
+
+    Indexing returns a `Segment` (or, for a slice, a `SegmentArray`); segments are only created when they are accessed.
+    Operations on all the segments at once (`angles`, `lengths`, `intersections`, `projections`) are vectorized.
+
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, starts, ends):
+        """
+        :param starts: array-like of shape (N, 2), initial points.
+
+        :param ends: array-like of shape (N, 2), final points.
+
+        """
+
+        self.starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+        self.ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+
+        if self.starts.shape != self.ends.shape:
+            raise ValueError(f'Initial and final points must have the same shape: {self.starts.shape}, '
+                             f'{self.ends.shape}.')
+
+    def __len__(self):
+
+        return len(self.starts)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return SegmentArray(self.starts[index], self.ends[index])
+
+        (xa, ya), (xb, yb) = self.starts[index].tolist(), self.ends[index].tolist()
+
+        return Segment((xa, ya), (xb, yb))
+
+    def __repr__(self):
+
+        return f'SegmentArray({self.starts.tolist()!r}, {self.ends.tolist()!r})'
+
+    def angles(self):
+        """
+        Return the angles (in degrees) of the segments wrt to x axis, as `Segment.angle` does.
+
+        :return np.ndarray: angles in interval [0.0; 360.0).
+
+        """
+
+        deltas = self.ends - self.starts
+        angles = np.degrees(np.arctan2(deltas[:, 1], deltas[:, 0]))
+
+        return np.where(angles < 0, angles + 360.0, angles)
+
+    def lengths(self):
+        """
+        Return the lengths of the segments.
+
+        :return np.ndarray:
+
+        """
+
+        return np.hypot(*(self.ends - self.starts).T)
+
+    def intersections(self, segment, extend=False):
+        """
+        Return the points where the segments meet another segment (see `Segment.intersection`).
+
+        :param Segment segment:
+
+        :param bool extend:
+
+        :return np.ndarray: array of shape (N, 2), with NaNs for the segments that do not meet the other one.
+
+        """
+
+        r = self.ends - self.starts
+        s = np.array([segment.xb - segment.xa, segment.yb - segment.ya])
+        q = np.array([segment.xa, segment.ya]) - self.starts
+
+        cross = r[:, 0] * s[1] - r[:, 1] * s[0]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (q[:, 0] * s[1] - q[:, 1] * s[0]) / cross
+            u = (q[:, 0] * r[:, 1] - q[:, 1] * r[:, 0]) / cross
+
+        meet = cross != 0
+        if not extend:
+            meet &= (0 <= t) & (t <= 1) & (0 <= u) & (u <= 1)
+
+        points = self.starts + t[:, np.newaxis] * r
+        points[~meet] = np.nan
+
+        return points
+
+    def projections(self, point):
+        """
+        Return the orthogonal projections of a point on the lines that contain the segments.
+
+        :param Point|tuple point:
+
+        :return np.ndarray: array of shape (N, 2).
+
+        """
+
+        r = self.ends - self.starts
+        t = np.einsum('ij,ij->i', np.asarray(point, dtype=float) - self.starts, r) / np.einsum('ij,ij->i', r, r)
+
+        return self.starts + t[:, np.newaxis] * r
+
+
+class Polyline(object):
+    """
+    A sequence of points joined by segments, possibly closed (the last point is then joined to the first one).
+
+    """
+
+    __slots__ = ('vertices', 'closed')
+
+    def __init__(self, vertices, closed=False):
+        """
+        :param vertices: array-like of shape (N, 2).
+
+        :param bool closed:
+
+        """
+
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 2)
+        self.closed = closed
+
+    def __len__(self):
+
+        return len(self.vertices) if self.closed else max(len(self.vertices) - 1, 0)
+
+    def __repr__(self):
+
+        return f'Polyline({self.vertices.tolist()!r}, closed={self.closed!r})'
+
+    @property
+    def segments(self):
+        """
+        The segments joining consecutive vertices (and, if the polyline is closed, the last vertex to the first one).
+
+        :return SegmentArray:
+
+        """
+
+        if self.closed:
+            return SegmentArray(self.vertices, np.roll(self.vertices, -1, axis=0))
+
+        return SegmentArray(self.vertices[:-1], self.vertices[1:])
+
+    def angles(self):
+        """
+        Return the angles (in degrees) of the segments wrt to x axis (see `SegmentArray.angles`).
+
+        :return np.ndarray:
+
+        """
+
+        return self.segments.angles()
+
+    def lengths(self):
+        """
+        Return the lengths of the segments.
+
+        :return np.ndarray:
+
+        """
+
+        return self.segments.lengths()
+
+    def length(self):
+        """
+        Return the total length of the segments.
+
+        :return float:
+
+        """
+
+        return float(self.lengths().sum())
@@ -1,12 +1,12 @@
 """
 Actions involving lines: segments, vectors etc.
 """
-from math import degrees, atan2
-
+import numpy as np
 from matplotlib import lines
 from matplotlib.transforms import Affine2D
 
 from ganim.elements import DoElement
+from ganim.geometry import Segment
 
 
 class DoLineSegment(DoElement):
@@ -27,23 +27,39 @@ class DoLineSegment(DoElement):
 
         * `effect`: 'None' | 'grow' | 'shrink' | 'fadein' | 'fadeout'
 
+        * `easing`: 'linear' | 'ease_in' | 'ease_out' | 'ease_in_out' (see ganim.easing)
+
         * `color`
 
         * `linewidth`
 
         * `linestyle`
 
+        * `batch`: if False, the segment is never drawn by a `ganim.batches.SegmentBatch` together with the
+          segments next to it in the script (default: True)
+
     """
 
-    def __init__(self, *args, **kwargs):
+    # Effects of this class (see DoElement.effects)
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+        'grow': {'init': 'init_grow', 'run': 'grow', 'update': 'update_grow'},
+        'shrink': {'init': 'init_shrink', 'run': 'grow', 'update': 'update_grow'},
+    }
+
+    # Default artist properties for line segment
+    default_artist_kwargs = {
+        'color': 'w',
+        'linewidth': 2.0,
+        'linestyle': 'solid',
+        'alpha': 1.0,
+    }
 
-        # Default artist properties for line segment
-        self.default_artist_kwargs = {
-            'color': 'w',
-            'linewidth': 2.0,
-            'linestyle': 'solid',
-            'alpha': 1.0,
-        }
+    __slots__ = ('xa', 'ya', 'xb', 'yb', 'scales', 'scale_matrices', 'scale_affine')
+
+    unpicklable_fields = DoElement.unpicklable_fields + ('scale_affine',)
+
+    def __init__(self, *args, **kwargs):
 
         # super() will store appropriate values in self.args and self.artist_kwargs dictionaries
         super().__init__(**kwargs)
@@ -57,25 +73,11 @@ class DoLineSegment(DoElement):
             self.xa, self.ya = self.args['point_a']
             self.xb, self.yb = self.args['point_b']
 
-        # To be used by 'grow' and 'shrink' effects
-        self.grow_factor = None
-
-    def define_effects_dict(self):
-        """
-        Define dictionary. Keys are names of effects, values are methods to implement the effects ('init': method to
-        initialize effect, 'run': method to apply effect).
-
-        """
-
-        super().define_effects_dict()
-
-        line_effects = {
-            'None': {'init': None, 'run': self.show},
-            'grow': {'init': self.init_grow, 'run': self.grow},
-            'shrink': {'init': self.init_grow, 'run': self.shrink},
-        }
-
-        self.effects.update(line_effects)
+        # To be used by 'grow' and 'shrink' effects: scale of the segment and matrix of the scaling transformation at
+        # each frame of the action (computed when cueing), and the transformation the current artist is drawn with
+        self.scales = None
+        self.scale_matrices = None
+        self.scale_affine = None
 
     def make_new_artist(self):
         """
@@ -111,45 +113,74 @@ class DoLineSegment(DoElement):
 
     def init_grow(self):
         """
-        Compute initial info necessary to implement grow effect.
+        Compute the scale of the segment at each frame of the grow effect.
 
         """
 
-        # During execution of this action, this factor will be multiplied by the current frame number to give the
-        # current scale of the segment to be drawn
-        self.grow_factor = 1 / self.total_no_of_frames
+        self.init_scales(self.get_progress())
+
+    def init_shrink(self):
+        """
+        Compute the scale of the segment at each frame of the shrink effect.
+
+        """
+
+        self.init_scales(1 - self.get_progress())
+
+    def init_scales(self, scales):
+        """
+        Store the scales of the segment for all frames of the action, with the matrices of the transformations that
+        scale the segment by them, keeping the initial point fixed.
+
+        :param np.ndarray scales: one scale per frame.
+
+        """
+
+        self.scales = scales
+
+        # Scale by s, then translate by (xa, ya) * (1 - s)
+        self.scale_matrices = np.zeros((len(scales), 3, 3))
+        self.scale_matrices[:, 0, 0] = scales
+        self.scale_matrices[:, 1, 1] = scales
+        self.scale_matrices[:, 0, 2] = self.xa * (1 - scales)
+        self.scale_matrices[:, 1, 2] = self.ya * (1 - scales)
+        self.scale_matrices[:, 2, 2] = 1.0
 
     def grow(self, current_frame_in_part):
         """
-        Make line: part of the segment, from initial point to a point corresponding to the current frame.
+        Make line: part of the segment, from initial point to a point corresponding to the current frame (grow and
+        shrink effects).
 
         :param current_frame_in_part: number of the current frame with respect to beginning of part.
 
         :return: artist (line) to be drawn.
         """
 
-        scale = (current_frame_in_part + 1) * self.grow_factor
-        self.artist_kwargs['transform'] = Affine2D().scale(scale) + \
-            Affine2D().translate(self.xa * (1 - scale), self.ya * (1 - scale)) + \
-            self.ax.transData
+        self.scale_affine = Affine2D(self.scale_matrices[current_frame_in_part])
+        self.artist_kwargs['transform'] = self.scale_affine + self.ax.transData
 
         return self.make_new_artist()
 
-    def shrink(self, current_frame_in_part):
+    def update_grow(self, current_frame_in_part):
         """
-        Make line: part of the segment, from initial point to a point corresponding to the current frame.
+        Change the current line in place to the part of the segment corresponding to the current frame (grow and
+        shrink effects). The line's transformation is composed with `scale_affine`, whose matrix is replaced.
 
         :param current_frame_in_part: number of the current frame with respect to beginning of part.
 
-        :return: artist (line) to be drawn.
         """
 
-        scale = 1 - (current_frame_in_part + 1) * self.grow_factor
-        self.artist_kwargs['transform'] = Affine2D().scale(scale) + \
-            Affine2D().translate(self.xa * (1 - scale), self.ya * (1 - scale)) + \
-            self.ax.transData
+        self.scale_affine.set_matrix(self.scale_matrices[current_frame_in_part])
 
-        return self.make_new_artist()
+    def get_segment(self):
+        """
+        Return the geometry of this segment (see ganim.geometry), for computations.
+
+        :return ganim.geometry.Segment:
+
+        """
+
+        return Segment((self.xa, self.ya), (self.xb, self.yb))
 
     def angle(self):
         """
@@ -161,22 +192,4 @@ class DoLineSegment(DoElement):
 
         """
 
-        # Vertical segment
-        if self.xa == self.xb:
-            if self.ya < self.yb:
-                return 90.0
-            else:
-                return 270.0
-
-        # Nonvertical segment
-        angle = degrees(
-                atan2(
-                        self.yb - self.ya,
-                        self.xb - self.xa
-                )
-        )
-
-        if angle < 0:
-            angle = 360.0 + angle
-
-        return angle
+        return self.get_segment().angle()
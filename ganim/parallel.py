@@ -0,0 +1,192 @@
+"""
+Parallel rendering of scenes.
+
+The frames of a scene are split into contiguous chunks. Each chunk is rendered by a worker process, which rebuilds the
+scene from its plan (see `Scene.get_plan`), seeks to the first frame of the chunk and saves the chunk to a segment
+file. The segment files are then concatenated by ffmpeg, without re-encoding.
+
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import matplotlib
+
+import ganim.core
+
+
+def split_frames(no_of_frames, no_of_chunks):
+    """
+    Split the frame numbers 0, 1, ..., `no_of_frames` - 1 into contiguous chunks of (almost) equal sizes.
+
+    :param int no_of_frames:
+
+    :param int no_of_chunks:
+
+    :return list[tuple[int, int]]: a list of tuples (first frame number, last frame number), one for each chunk.
+
+    """
+
+    no_of_chunks = max(1, min(no_of_chunks, no_of_frames))
+    chunk_size, remainder = divmod(no_of_frames, no_of_chunks)
+
+    chunks = []
+    first_frame_no = 0
+
+    for i in range(no_of_chunks):
+        # The first `remainder` chunks get one extra frame each
+        last_frame_no = first_frame_no + chunk_size + (1 if i < remainder else 0) - 1
+        chunks.append((first_frame_no, last_frame_no))
+        first_frame_no = last_frame_no + 1
+
+    return chunks
+
+
+def apply_plan_style(plan):
+    """
+    Apply the matplotlib style stored in a scene plan to the current process (the scene's configuration is applied
+    by `Scene.from_plan`).
+
+    :param dict plan: as returned by `Scene.get_plan`.
+
+    """
+
+    matplotlib.rcParams.update(plan['style'])
+
+
+def render_chunk(plan, first_frame_no, last_frame_no, filename, writer):
+    """
+    Rebuild a scene from its plan and save frames `first_frame_no` to `last_frame_no` (inclusive) to a file.
+
+    This is the function executed by the worker processes.
+
+    :param dict plan: as returned by `Scene.get_plan`.
+
+    :param int first_frame_no: counted from the beginning of the scene.
+
+    :param int last_frame_no: counted from the beginning of the scene.
+
+    :param str filename: segment file.
+
+    :param writer: a movie writer, or 'matplotlib' (see `Scene.save`).
+
+    :return tuple[str, dict]: the name of the segment file and the statistics reported by the writer (None for
+        matplotlib's writer).
+
+    """
+
+    apply_plan_style(plan)
+
+    scene = ganim.core.Scene.from_plan(plan)
+    scene.cue_parts()
+
+    return filename, scene.render_frames(filename, writer, first_frame_no, last_frame_no)
+
+
+def concat_segments(segment_filenames, filename):
+    """
+    Concatenate video segments into a single file, without re-encoding (ffmpeg's concat demuxer).
+
+    All segments must have been encoded with the same parameters.
+
+    :param list[str] segment_filenames:
+
+    :param str filename: output file.
+
+    """
+
+    list_fd, list_filename = tempfile.mkstemp(prefix='ganim-', suffix='.txt')
+
+    try:
+        with os.fdopen(list_fd, 'w') as list_file:
+            for segment_filename in segment_filenames:
+                list_file.write(f"file '{os.path.abspath(segment_filename)}'\n")
+
+        subprocess.run(
+                [
+                    matplotlib.rcParams['animation.ffmpeg_path'],
+                    '-y',
+                    '-loglevel', 'error',
+                    '-f', 'concat',
+                    '-safe', '0',
+                    '-i', list_filename,
+                    '-c', 'copy',
+                    filename,
+                ],
+                check=True
+        )
+    finally:
+        os.remove(list_filename)
+
+
+def get_context():
+    """
+    Return the multiprocessing context for the worker processes.
+
+    Forking is preferred where available, as it does not re-import the user's script in the workers (scripts that
+    build and save a scene at module level would then be executed again by each worker).
+
+    """
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+
+    return multiprocessing.get_context('spawn')
+
+
+def save_in_parallel(scene, filename, workers, writer):
+    """
+    Save a scene to a file, rendering chunks of frames in parallel.
+
+    :param ganim.core.Scene scene:
+
+    :param str filename:
+
+    :param int workers: number of worker processes (and of chunks).
+
+    :param writer: a movie writer (each worker gets a copy), or 'matplotlib'.
+
+    :return dict: number of frames, total seconds and frames per second achieved by all workers together (None for
+        matplotlib's writer).
+
+    """
+
+    start_time = time.perf_counter()
+
+    scene.cue_parts()
+    no_of_frames = scene.last_frame_no + 1
+
+    plan = scene.get_plan()
+    extension = os.path.splitext(filename)[1]
+
+    segment_dir = tempfile.mkdtemp(prefix='ganim-', dir=os.path.dirname(os.path.abspath(filename)))
+
+    try:
+        with get_context().Pool(workers) as pool:
+            results = [
+                pool.apply_async(
+                        render_chunk,
+                        (plan, first, last, os.path.join(segment_dir, f'{i:05d}{extension}'), writer)
+                )
+                for i, (first, last) in enumerate(split_frames(no_of_frames, workers))
+            ]
+            segment_filenames = [result.get()[0] for result in results]
+
+        concat_segments(segment_filenames, filename)
+    finally:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+
+    if writer == 'matplotlib':
+        return None
+
+    seconds = time.perf_counter() - start_time
+
+    return {
+        'frames': no_of_frames,
+        'seconds': seconds,
+        'fps': no_of_frames / seconds,
+    }
@@ -2,8 +2,13 @@
 Points.
 """
 
-# Import transformations
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.collections import PathCollection
+from matplotlib.colors import to_rgba_array
 from matplotlib.lines import Line2D
+from matplotlib.markers import MarkerStyle
+from matplotlib.transforms import IdentityTransform
 
 from ganim.elements import DoElement
 
@@ -14,6 +19,20 @@ class DoPoint(DoElement):
 
     """
 
+    # Effects of this class (see DoElement.effects)
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+    }
+
+    # Default properties of the artist
+    default_artist_kwargs = {
+        'color': 'w',
+        'markersize': 4.0,
+        'marker': 'o',
+    }
+
+    __slots__ = ('x0', 'y0')
+
     def __init__(self, *args, **kwargs):
         """
         * **Positional arguments:**
@@ -32,13 +51,6 @@ class DoPoint(DoElement):
 
         """
 
-        # Add default properties to artist
-        self.default_artist_kwargs = {
-            'color': 'w',
-            'markersize': 4.0,
-            'marker': 'o',
-        }
-
         # This command must be included: super() will store kwargs in the self.args dictionary and in the
         # self.artist.kwargs dictionary
         super().__init__(*args, **kwargs)
@@ -50,30 +62,6 @@ class DoPoint(DoElement):
             # ...or coordinates may be given as kwargs
             self.x0, self.y0 = self.args['coords']
 
-    def define_effects_dict(self):
-        """
-        Define effects dictionary.
-
-        Keys are names of effects, values are methods to implement the effects ('init': method to initialize effect,
-        'run': method to apply effect).
-
-        'init' methods must return nothing. They should store information in fields.
-
-        'run' methods must return the new artist to be drawn.
-
-        """
-
-        # Ask superclass to initialize effects dict
-        super().define_effects_dict()
-
-        # Create effects dict for this class
-        element_effects = {
-            'None': {'init': None, 'run': self.show},
-        }
-
-        # Update dictionary of effects with the effects created above
-        self.effects.update(element_effects)
-
     def show(self, current_frame_in_part):
         """
         Make artist to be drawn.
@@ -118,3 +106,221 @@ class DoPoint(DoElement):
         self.artist = self.new_artist
 
         self.ax.add_line(self.artist)
+
+
+class DoPoints(DoElement):
+    """
+    Class to draw many 2D points at once (a point cloud), with various options of animation effects.
+
+    All the points are drawn by a single artist (a matplotlib PathCollection), and effects are applied to all the
+    points at once, as operations on NumPy arrays. For thousands of points, this is much faster than one `DoPoint`
+    per point.
+
+    """
+
+    # Effects of this class (see DoElement.effects). The fadein and fadeout effects inherited from DoElement call the
+    # methods fade and set_alpha, which are redefined below, for arrays of alphas
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+        'stagger': {'init': 'init_stagger', 'run': 'stagger', 'update': 'update_stagger'},
+    }
+
+    # Default properties of the artist
+    default_artist_kwargs = {
+        'color': 'w',
+        'markersize': 4.0,
+        'marker': 'o',
+        'alpha': 1.0,
+    }
+
+    __slots__ = ('coords', 'colors', 'sizes', 'point_alphas', 'stagger_fraction', 'stagger_progress', 'stagger_starts')
+
+    def __init__(self, *args, **kwargs):
+        """
+        * **Positional arguments:**
+
+            * `coords`: array-like of shape (N, 2), with the coordinates of the points
+
+        * **Keyword arguments:**
+
+            * `coords`: (if not specified as a positional arg)
+
+            * `effect`: 'None' | 'fadein' | 'fadeout' | 'stagger' (points fade in one after the other, in the order
+              given)
+
+            * `color`: a single color, or one color per point
+
+            * `markersize`: a single size, or one size per point (diameter in points, as in `DoPoint`)
+
+            * `alpha`: a single alpha, or one alpha per point
+
+            * `marker`: a single marker for all points
+
+            * `stagger_fraction`: for the 'stagger' effect, fraction of the duration of the action that each point
+              takes to fade in, greater than 0 and at most 1 (default: 0.2)
+
+        """
+
+        # This command must be included: super() will store kwargs in the self.args dictionary and in the
+        # self.artist.kwargs dictionary
+        super().__init__(*args, **kwargs)
+
+        if len(args) == 1:
+            # Coordinates may be given as positional args...
+            self.coords = np.asarray(args[0], dtype=float)
+        else:
+            # ...or coordinates may be given as kwargs
+            self.coords = np.asarray(self.args['coords'], dtype=float)
+
+        if self.coords.ndim != 2 or self.coords.shape[1] != 2:
+            raise ValueError(f'Coordinates must have shape (N, 2), not {self.coords.shape}.')
+
+        n = len(self.coords)
+
+        # Colors of the points (RGBA, one row per point), with their own alphas
+        self.colors = to_rgba_array(self.artist_kwargs['color'])
+        if len(self.colors) == 1:
+            self.colors = np.repeat(self.colors, n, axis=0)
+        self.colors[:, 3] *= np.broadcast_to(np.asarray(self.artist_kwargs['alpha'], dtype=float), (n,))
+
+        # Areas of the markers, in points squared (markersize is a diameter)
+        self.sizes = np.broadcast_to(np.asarray(self.artist_kwargs['markersize'], dtype=float), (n,)) ** 2
+
+        # Alpha applied by the effects to each point (multiplies the points' own alphas)
+        self.point_alphas = np.ones(n)
+
+        # To be used by the 'stagger' effect
+        self.stagger_fraction = self.args.get('stagger_fraction', 0.2)
+        if not 0 < self.stagger_fraction <= 1:
+            raise ValueError(f'Stagger fraction must be greater than 0 and at most 1, not {self.stagger_fraction}.')
+        self.stagger_progress = None
+        self.stagger_starts = None
+
+    def show(self, current_frame_in_part):
+        """
+        Make artist to be drawn.
+
+        :return: artist to be drawn.
+
+        """
+
+        return self.make_new_artist()
+
+    def get_colors(self):
+        """
+        Return the current colors of the points: their own colors, with alphas multiplied by the effects' alphas.
+
+        :return np.ndarray: array of shape (N, 4).
+
+        """
+
+        colors = self.colors.copy()
+        colors[:, 3] *= self.point_alphas
+
+        return colors
+
+    def make_new_artist(self):
+        """
+        Compute new form of the element to be drawn: a single collection with all the points.
+
+        :return: new artist to be drawn.
+
+        """
+
+        marker = MarkerStyle(self.artist_kwargs['marker'])
+        path = marker.get_path().transformed(marker.get_transform())
+        colors = self.get_colors()
+
+        new_points = PathCollection(
+                (path,),
+                sizes=self.sizes,
+                facecolors=colors,
+                edgecolors=colors,
+                linewidths=rcParams['lines.markeredgewidth'],
+                offsets=self.coords,
+                offset_transform=self.ax.transData
+        )
+        new_points.set_transform(IdentityTransform())
+
+        return new_points
+
+    def draw_element(self):
+        """
+        Remove previous form of the element, draw current form of the element, and update self.artist.
+
+        """
+
+        self.remove_artist()
+        self.artist = self.new_artist
+
+        # The limits of the scene are fixed: the points must not change them
+        self.ax.add_collection(self.artist, autolim=False)
+
+    def set_alpha(self, alpha):
+        """
+        Change the alpha of all points in place (the points' own alphas are multiplied by it).
+
+        :param float|np.ndarray alpha: a single alpha, or one alpha per point.
+
+        """
+
+        self.point_alphas[:] = alpha
+
+        if self.artist is not None:
+            colors = self.get_colors()
+            self.artist.set_facecolors(colors)
+            self.artist.set_edgecolors(colors)
+
+    def fade(self, current_frame_in_part):
+        """
+        Make artist with the alpha of the current frame (fadein and fadeout effects).
+
+        :return: artist to be drawn.
+
+        """
+
+        self.point_alphas[:] = self.fade_alphas[current_frame_in_part]
+
+        return self.make_new_artist()
+
+    def init_stagger(self):
+        """
+        Compute initial info necessary to implement the stagger effect: the progress of the effect at each frame and
+        the progress (a fraction of the duration of the action) when each point starts to fade in.
+
+        """
+
+        self.stagger_progress = self.get_progress()
+        self.stagger_starts = np.linspace(0.0, 1.0 - self.stagger_fraction, len(self.coords))
+
+    def get_stagger_alphas(self, current_frame_in_part):
+        """
+        Return the alpha of each point in the current frame of the stagger effect.
+
+        :return np.ndarray:
+
+        """
+
+        t = self.stagger_progress[current_frame_in_part]
+
+        return np.clip((t - self.stagger_starts) / self.stagger_fraction, 0.0, 1.0)
+
+    def stagger(self, current_frame_in_part):
+        """
+        Make artist with the points faded in up to the current frame.
+
+        :return: artist to be drawn.
+
+        """
+
+        self.point_alphas[:] = self.get_stagger_alphas(current_frame_in_part)
+
+        return self.make_new_artist()
+
+    def update_stagger(self, current_frame_in_part):
+        """
+        Change the current artist in place: points faded in up to the current frame.
+
+        """
+
+        self.set_alpha(self.get_stagger_alphas(current_frame_in_part))
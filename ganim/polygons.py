@@ -2,11 +2,12 @@
 Polygons.
 """
 
+import numpy as np
 from matplotlib.colors import to_rgba
 from matplotlib.patches import Polygon
 
 from ganim.elements import DoElement
-from ganim.line_elements import DoLineSegment
+from ganim.geometry import Polyline, SegmentArray
 
 
 class DoPolygon(DoElement):
@@ -15,6 +16,23 @@ class DoPolygon(DoElement):
 
     """
 
+    # Effects of this class (see DoElement.effects)
+    effects = {
+        'None': {'init': None, 'run': 'show', 'update': 'keep'},
+    }
+
+    # Default properties of the artist
+    default_artist_kwargs = {
+        'facecolor': 'y',
+        'edgecolor': 'w',
+        'fill': True,
+        'edgealpha': 1.0,
+        'facealpha': 0.5,
+        'linewidth': 2.0,
+    }
+
+    __slots__ = ('vertices', '_outline', '_sides')
+
     def __init__(self, *args, **kwargs):
         """
         * **Positional arguments:**
@@ -39,20 +57,14 @@ class DoPolygon(DoElement):
 
             * `fill`: if True, polygon is filled with `facecolor` (default: True).
 
-            * `effect`: 'None' | ...
+            * `effect`: 'None' | 'fadein' | 'fadeout' (fades multiply the alphas of edges and faces)
 
             * `linewidth`: default: 2.0.
 
-        """
+            * `batch`: if False, the polygon is never drawn by a `ganim.batches.PolygonBatch` together with the
+              polygons next to it in the script (default: True).
 
-        self.default_artist_kwargs = {
-            'facecolor': 'y',
-            'edgecolor': 'w',
-            'fill': True,
-            'edgealpha': 1.0,
-            'facealpha': 0.5,
-            'linewidth': 2.0,
-        }
+        """
 
         # This command must be included: super() will store kwargs in the self.args dictionary and in the
         # self.artist.kwargs dictionary
@@ -82,36 +94,59 @@ class DoPolygon(DoElement):
         if len(self.vertices) < 3:
             raise ValueError('Polygon must have 3 or more vertices.')
 
-        # Build line segments (not for drawing, but for other operations -- e.g., building angles)
-        sides = zip(self.vertices, self.vertices[1:])
-        self.sides = [DoLineSegment((a, b), (c, d)) for (a, b), (c, d) in sides]
-        self.sides.append(DoLineSegment(self.vertices[0], self.vertices[-1]))
+        # Outline and sides (not for drawing, but for other operations -- e.g., building angles), computed when first
+        # needed: see the outline and sides properties
+        self._outline = None
+        self._sides = None
+
+    def __getstate__(self):
+        """
+        Return the state of this polygon to be pickled (see `DoElement.__getstate__`). The outline and the sides are
+        left out, as they are computed again from the vertices when needed.
+
+        """
+
+        state = super().__getstate__()
+        state['_outline'] = None
+        state['_sides'] = None
 
-    def define_effects_dict(self):
+        return state
+
+    @property
+    def outline(self):
         """
-        Define effects dictionary.
+        The outline of the polygon: a closed polyline through its vertices, e.g., for its perimeter
+        (`outline.length()`).
+
+        :return ganim.geometry.Polyline:
 
-        Keys are names of effects, values are methods to implement the effects ('init': method to initialize effect,
-        'run': method to apply effect).
+        """
 
-        'init' methods must return nothing. They should store information in fields.
+        if self._outline is None:
+            self._outline = Polyline(self.vertices, closed=True)
 
-        'run' methods must return the new artist to be drawn.
+        return self._outline
 
+    @property
+    def sides(self):
         """
+        The sides of the polygon, as a sequence of `ganim.geometry.Segment`: from each vertex to the next one and,
+        last, from the first vertex to the last one (so that the first and the last sides both start at the first
+        vertex, e.g., to build the angle there).
+
+        :return ganim.geometry.SegmentArray:
 
-        # Ask superclass to initialize effects dict
-        super().define_effects_dict()
+        """
 
-        # Create effects dict for this class.
-        # Some effects are created and handled by the DoElement superclass, as such effects do not depend on the
-        # nature of the element. Examples are fadein and fadeout. You don't have to worry about them
-        element_effects = {
-            'None': {'init': None, 'run': self.show},
-        }
+        if self._sides is None:
+            # The segments of the outline, with the closing one (from the last vertex to the first) reversed
+            segments = self.outline.segments
+            self._sides = SegmentArray(
+                    np.concatenate([segments.starts[:-1], segments.ends[-1:]]),
+                    np.concatenate([segments.ends[:-1], segments.starts[-1:]])
+            )
 
-        # Update dictionary of effects with the effects created above
-        self.effects.update(element_effects)
+        return self._sides
 
     def show(self, current_frame_in_part):
         """
@@ -125,6 +160,40 @@ class DoPolygon(DoElement):
         # The current_frame_in_part parameter value is not needed
         return self.make_new_artist()
 
+    def get_colors(self):
+        """
+        Return the colors of edges and face, with their own alphas multiplied by the alpha given by the effect (if
+        any: see `DoElement.fade` and `set_alpha`).
+
+        :return tuple: (edgecolor, facecolor), as RGBA tuples.
+
+        """
+
+        edgecolor = self.artist_kwargs['edgecolor']
+        facecolor = self.artist_kwargs['facecolor']
+
+        alpha = self.artist_kwargs.get('alpha')
+        if alpha is not None:
+            edgecolor = edgecolor[:3] + (edgecolor[3] * alpha,)
+            facecolor = facecolor[:3] + (facecolor[3] * alpha,)
+
+        return edgecolor, facecolor
+
+    def set_alpha(self, alpha):
+        """
+        Change the alpha of the current polygon in place: the alphas of edges and face are multiplied by it.
+
+        :param float alpha:
+
+        """
+
+        self.artist_kwargs['alpha'] = alpha
+
+        if self.artist is not None:
+            edgecolor, facecolor = self.get_colors()
+            self.artist.set_edgecolor(edgecolor)
+            self.artist.set_facecolor(facecolor)
+
     def make_new_artist(self):
         """
         Compute new form of the element to be drawn, using information from self's fields.
@@ -137,10 +206,16 @@ class DoPolygon(DoElement):
 
         """
 
+        edgecolor, facecolor = self.get_colors()
+
+        # The alpha (if any) is already in the colors: a Polygon's alpha would replace theirs
+        kwargs = {key: value for key, value in self.artist_kwargs.items() if key != 'alpha'}
+        kwargs.update(edgecolor=edgecolor, facecolor=facecolor)
+
         polygon = Polygon(
                 self.vertices,
                 closed=True,
-                **self.artist_kwargs
+                **kwargs
         )
 
         return polygon
@@ -0,0 +1,163 @@
+"""
+Profiling of scene rendering.
+
+A `Profiler` attached to a scene (see the `profile` argument of `Scene`) records how long each stage of the rendering
+takes:
+
+* 'run', 'update', 'draw_element' and 'remove_artist': for each action (named after its class and effect);
+
+* 'canvas draw': drawing a frame on the canvas;
+
+* 'writer': handing a frame to the movie writer (with matplotlib's movie writers, this includes drawing the figure;
+  for `Scene.render_frame`, copying the frame or encoding it as PNG);
+
+* 'frame': the whole frame (for `Scene.render_frame`, including bringing the figure to the frame's state).
+
+Frames are recorded when saving (with any writer) and when rendering a single frame (see `Scene.render_frame`).
+
+Timings are aggregated as they arrive; with `trace=True`, every event is also kept, to be written as a Chrome trace
+(viewable in chrome://tracing or Perfetto). Hooks (callables) may be given to receive every event as well.
+
+"""
+
+import json
+import os
+import time
+
+
+class Profiler(object):
+
+    def __init__(self, trace=False, hooks=None):
+        """
+        Create a new profiler.
+
+        :param bool trace: if True, keep every event, so that a Chrome trace can be written (see
+            `write_chrome_trace`). Otherwise, only aggregated timings are kept.
+
+        :param list hooks: callables to be called for each event, as hook(category, name, start, end, frame_no), with
+            times in seconds (from time.perf_counter).
+
+        """
+
+        self.trace = trace
+        self.hooks = [] if hooks is None else list(hooks)
+
+        self.start_time = time.perf_counter()
+
+        # (category, name) -> [count, total time, maximum time]
+        self.totals = {}
+
+        # Duration of each frame, by frame number
+        self.frame_times = {}
+
+        # Events, if tracing: tuples (category, name, start, end, frame_no)
+        self.events = []
+
+        # Frame being rendered (to be attached to events)
+        self.frame_no = None
+
+    def add(self, category, name, start, end):
+        """
+        Record an event.
+
+        :param str category: e.g., 'run', 'canvas draw'.
+
+        :param str name: e.g., 'DoLineSegment:grow'.
+
+        :param float start: from time.perf_counter.
+
+        :param float end: from time.perf_counter.
+
+        """
+
+        duration = end - start
+
+        total = self.totals.get((category, name))
+        if total is None:
+            self.totals[(category, name)] = [1, duration, duration]
+        else:
+            total[0] += 1
+            total[1] += duration
+            if duration > total[2]:
+                total[2] = duration
+
+        if category == 'frame':
+            self.frame_times[self.frame_no] = duration
+
+        if self.trace:
+            self.events.append((category, name, start, end, self.frame_no))
+
+        for hook in self.hooks:
+            hook(category, name, start, end, self.frame_no)
+
+    def get_report(self, top=10):
+        """
+        Return a report of the timings: totals for each category, the `top` most expensive actions (by class and
+        effect) and the `top` slowest frames.
+
+        :param int top:
+
+        :return str:
+
+        """
+
+        lines = ['Totals by category:']
+
+        categories = {}
+        for (category, _), (count, total, _) in self.totals.items():
+            category_count, category_total = categories.get(category, (0, 0.0))
+            categories[category] = (category_count + count, category_total + total)
+
+        for category, (count, total) in sorted(categories.items(), key=lambda item: -item[1][1]):
+            lines.append(f'  {category:<15} {total:10.3f} s {count:10d} calls {1000 * total / count:10.3f} ms/call')
+
+        action_categories = ('run', 'update', 'draw_element', 'remove_artist')
+
+        actions = {}
+        for (category, name), (count, total, maximum) in self.totals.items():
+            if category in action_categories:
+                action_count, action_total, action_maximum = actions.get(name, (0, 0.0, 0.0))
+                actions[name] = (action_count + count, action_total + total, max(action_maximum, maximum))
+
+        lines.append(f'Slowest actions (by class and effect, top {top}):')
+
+        for name, (count, total, maximum) in sorted(actions.items(), key=lambda item: -item[1][1])[:top]:
+            lines.append(f'  {name:<30} {total:10.3f} s {count:10d} calls {1000 * maximum:10.3f} ms max')
+
+        lines.append(f'Slowest frames (top {top}):')
+
+        for frame_no, duration in sorted(self.frame_times.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f'  frame {frame_no:<10} {1000 * duration:10.3f} ms')
+
+        return '\n'.join(lines)
+
+    def write_chrome_trace(self, filename):
+        """
+        Write the recorded events as a Chrome trace (JSON). The profiler must have been created with `trace=True`.
+
+        :param str filename:
+
+        """
+
+        if not self.trace:
+            raise ValueError('Profiler was created without trace=True: no events to write.')
+
+        pid = os.getpid()
+
+        trace_events = [
+            {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                # Microseconds since the profiler was created
+                'ts': (start - self.start_time) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': pid,
+                'tid': 0,
+                'args': {'frame': frame_no},
+            }
+            for category, name, start, end, frame_no in self.events
+        ]
+
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,510 @@
+"""
+Movie writers.
+
+Matplotlib's movie writers call `savefig` for every frame, which redraws the whole figure and copies the image
+several times before it reaches ffmpeg. The writers here take frames that have already been drawn on an Agg canvas
+(see `Scene.write_frames`) and send them to ffmpeg as they are.
+
+`ThreadedWriter` wraps such a writer, so that drawing a frame and encoding the previous ones overlap.
+
+`get_default_writer` returns the writer used by `Scene.save` when none is given.
+
+"""
+
+import os
+import queue
+import subprocess
+import threading
+import time
+
+import matplotlib
+import numpy as np
+
+# Codec and pixel format used by default for each kind of output file the writers here are made for (by extension).
+# Other files (e.g., GIFs) are written with the codec and pixel format ffmpeg chooses for them, and are saved with
+# matplotlib's movie writer when no writer is given (see get_default_writer)
+VIDEO_FORMATS = {
+    '.mp4': ('libx264', 'yuv420p'),
+    '.mkv': ('libx264', 'yuv420p'),
+    '.mov': ('libx264', 'yuv420p'),
+}
+
+
+def get_video_format(filename):
+    """
+    Return the default codec and pixel format for an output file (see `VIDEO_FORMATS`), or (None, None) if ffmpeg
+    must choose them.
+
+    :param str filename:
+
+    :return tuple[str, str]:
+
+    """
+
+    return VIDEO_FORMATS.get(os.path.splitext(filename)[1].lower(), (None, None))
+
+
+class FFMpegPipeWriter(object):
+    """
+    Movie writer that streams raw RGBA frames into the standard input of an ffmpeg process.
+
+    * **Keyword arguments:**
+
+        * `codec`: video codec, as understood by ffmpeg (default: chosen by the extension of the output file, see
+          `VIDEO_FORMATS`: 'libx264' for MP4, MKV and MOV files; for other files, ffmpeg's choice).
+
+        * `crf`: constant rate factor, i.e., quality (default: 23; 0 is lossless with libx264; None: do not pass it).
+          Only passed with a codec (given or chosen by extension).
+
+        * `preset`: encoding speed preset (default: 'medium'; None: do not pass it). Only passed with a codec.
+
+        * `pix_fmt`: pixel format of the output file (default: chosen by extension as `codec`: 'yuv420p' for MP4, MKV
+          and MOV files; for other files, ffmpeg's choice).
+
+        * `extra_args`: list of additional ffmpeg arguments for the output file (default: None).
+
+    After `finish`, `get_stats` reports how many frames were written (and how many of them were holds: see
+    `write_hold`) and how fast.
+
+    """
+
+    def __init__(self, codec=None, crf=23, preset='medium', pix_fmt=None, extra_args=None):
+
+        self.codec = codec
+        self.crf = crf
+        self.preset = preset
+        self.pix_fmt = pix_fmt
+        self.extra_args = extra_args
+
+        # Fields to be assigned to by the setup() method
+        self.filename = None
+        self.fps = None
+
+        # The ffmpeg process is started when the first frame arrives, as the frame size is only known then
+        self.process = None
+
+        # Last frame written (see write_hold)
+        self.last_buffer = None
+
+        self.no_of_frames = 0
+        self.no_of_holds = 0
+        self.start_time = None
+        self.end_time = None
+
+    def get_settings(self):
+        """
+        Return the settings that affect the encoded video, as a dictionary.
+
+        :return dict:
+
+        """
+
+        return {
+            'codec': self.codec,
+            'crf': self.crf,
+            'preset': self.preset,
+            'pix_fmt': self.pix_fmt,
+            'extra_args': self.extra_args,
+        }
+
+    def setup(self, filename, fps):
+        """
+        Prepare to write a new file.
+
+        :param str filename:
+
+        :param int|float fps: frames per second.
+
+        """
+
+        self.filename = filename
+        self.fps = fps
+
+        self.process = None
+        self.last_buffer = None
+        self.no_of_frames = 0
+        self.no_of_holds = 0
+        self.start_time = time.perf_counter()
+        self.end_time = None
+
+    def get_command(self, width, height):
+        """
+        Return the command line that runs ffmpeg for frames of the given size (in pixels).
+
+        :return list[str]:
+
+        """
+
+        command = [
+            matplotlib.rcParams['animation.ffmpeg_path'],
+            '-y',
+            '-loglevel', 'error',
+            # Input: raw frames from stdin
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgba',
+            '-s', f'{width}x{height}',
+            '-r', str(self.fps),
+            '-i', '-',
+        ]
+
+        # Output
+        default_codec, default_pix_fmt = get_video_format(self.filename)
+        codec = default_codec if self.codec is None else self.codec
+        pix_fmt = default_pix_fmt if self.pix_fmt is None else self.pix_fmt
+
+        # The rate factor and preset are options of the codec: without one, ffmpeg's choice may not take them
+        if codec is not None:
+            command += ['-c:v', codec]
+
+            if self.crf is not None:
+                command += ['-crf', str(self.crf)]
+
+            if self.preset is not None:
+                command += ['-preset', self.preset]
+
+        if pix_fmt is not None:
+            # Subsampled pixel formats (e.g., yuv420p) need even dimensions
+            if width % 2 or height % 2:
+                command += ['-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2']
+
+            command += ['-pix_fmt', pix_fmt]
+
+        if self.extra_args:
+            command += list(self.extra_args)
+
+        return command + [self.filename]
+
+    def write_frame(self, buffer):
+        """
+        Write a frame.
+
+        :param memoryview buffer: RGBA buffer of shape (height, width, 4), e.g., as returned by
+            `FigureCanvasAgg.buffer_rgba()`. It is written as it is, without copies.
+
+        """
+
+        if self.process is None:
+            height, width = buffer.shape[:2]
+            self.process = subprocess.Popen(self.get_command(width, height), stdin=subprocess.PIPE)
+
+        self.process.stdin.write(buffer)
+        self.last_buffer = buffer
+        self.no_of_frames += 1
+
+    def write_hold(self):
+        """
+        Write the last frame again (a hold: see `Scene.write_frames`).
+
+        The buffer given to the last call to `write_frame` must not have changed since: it is written again as it is.
+        Raw frames piped into ffmpeg carry no timestamps, so the frame is still sent (and encoded, as a frame where
+        nothing moves, which is cheap); but nothing is drawn or copied for it.
+
+        """
+
+        if self.last_buffer is None:
+            raise ValueError('No frame to hold: write_frame must be called first.')
+
+        self.process.stdin.write(self.last_buffer)
+        self.no_of_frames += 1
+        self.no_of_holds += 1
+
+    def finish(self):
+        """
+        Wait for ffmpeg to encode the remaining frames and close the file.
+
+        """
+
+        self.last_buffer = None
+
+        if self.process is not None:
+            self.process.stdin.close()
+            returncode = self.process.wait()
+            self.process = None
+
+            if returncode != 0:
+                raise RuntimeError(f'ffmpeg exited with code {returncode} while writing {self.filename}.')
+
+        self.end_time = time.perf_counter()
+
+    def get_stats(self):
+        """
+        Return a dictionary with the number of frames written, the number of them that were holds, the time it took
+        (in seconds, from `setup` to `finish`) and the number of frames written per second.
+
+        :return dict:
+
+        """
+
+        end_time = time.perf_counter() if self.end_time is None else self.end_time
+        seconds = end_time - self.start_time
+
+        return {
+            'frames': self.no_of_frames,
+            'holds': self.no_of_holds,
+            'seconds': seconds,
+            'fps': self.no_of_frames / seconds if seconds > 0 else 0.0,
+        }
+
+
+# Marker put in the queue of a ThreadedWriter for a hold
+HOLD = 'hold'
+
+
+class ThreadedWriter(object):
+    """
+    Movie writer that hands frames to another writer (e.g., an `FFMpegPipeWriter`) in a background thread.
+
+    Each frame is copied into one of `queue_size` reusable buffers and put in a queue; the writer thread takes frames
+    from the queue, writes them and gives their buffers back. While ffmpeg encodes (and the writer thread waits for
+    it, without holding the GIL), the main thread is free to draw the next frames. When all buffers are in the queue,
+    the main thread waits for one to be given back: memory use is bounded, and drawing never gets more than
+    `queue_size` frames ahead of encoding. (One more buffer keeps the last frame written, for holds: see `write_hold`.
+    Holds take no buffer, but they wait too when the queue already has `queue_size + 1` frames and holds.)
+
+    * **Keyword arguments:**
+
+        * `writer`: the writer that writes the frames (default: an `FFMpegPipeWriter` with default settings).
+
+        * `queue_size`: maximum number of frames waiting to be written (default: 4).
+
+    After `finish`, `get_stats` reports the statistics of the wrapped writer, with the occupancy of the queue and the
+    time each side spent waiting for the other, which shows whether drawing or encoding is the bottleneck.
+
+    """
+
+    def __init__(self, writer=None, queue_size=4):
+
+        if queue_size < 1:
+            raise ValueError(f'Queue size must be at least 1, not {queue_size}.')
+
+        self.writer = FFMpegPipeWriter() if writer is None else writer
+        self.queue_size = queue_size
+
+        # Fields to be assigned to by the setup() method. Buffers are allocated when the first frame arrives, as the
+        # frame size is only known then
+        self.buffers = None
+        self.free_buffers = None
+        self.frames = None
+        self.thread = None
+        self.error = None
+
+        # Queue occupancy when each frame was put in the queue, and time each side spent waiting for the other
+        self.occupancy_total = 0
+        self.occupancy_max = 0
+        self.draw_wait = 0.0
+        self.encode_wait = 0.0
+
+    def get_settings(self):
+        """
+        Return the settings that affect the encoded video (those of the wrapped writer), as a dictionary.
+
+        :return dict:
+
+        """
+
+        return self.writer.get_settings()
+
+    def setup(self, filename, fps):
+        """
+        Prepare to write a new file, and start the writer thread.
+
+        :param str filename:
+
+        :param int|float fps: frames per second.
+
+        """
+
+        self.writer.setup(filename, fps)
+
+        self.buffers = None
+        self.free_buffers = queue.Queue()
+        # Frames (buffers) and holds (HOLD), to be written in order. Holds take no buffer, so the queue is bounded
+        # too: otherwise long holds would pile up in it while ffmpeg is busy, and drawing would run ahead of encoding
+        # by any number of frames. One more place than there are buffers to spare lets a hold follow a full queue
+        self.frames = queue.Queue(maxsize=self.queue_size + 1)
+        self.error = None
+
+        self.occupancy_total = 0
+        self.occupancy_max = 0
+        self.draw_wait = 0.0
+        self.encode_wait = 0.0
+
+        self.thread = threading.Thread(target=self.write_frames, name='ganim-writer', daemon=True)
+        self.thread.start()
+
+    def write_frames(self):
+        """
+        Write the frames put in the queue, until None is put in it (run by the writer thread).
+
+        The buffer of the last frame written is only given back when the next frame is written, so that holds may
+        write it again.
+
+        """
+
+        last_buffer = None
+
+        while True:
+            wait_start_time = time.perf_counter()
+            buffer = self.frames.get()
+            self.encode_wait += time.perf_counter() - wait_start_time
+
+            if buffer is None:
+                return
+
+            # After an error, frames are only taken from the queue, so that the main thread does not wait forever
+            if self.error is None:
+                try:
+                    if buffer is not HOLD:
+                        self.writer.write_frame(buffer)
+                    elif hasattr(self.writer, 'write_hold'):
+                        self.writer.write_hold()
+                    else:
+                        self.writer.write_frame(last_buffer)
+                except BaseException as e:
+                    self.error = e
+
+            if buffer is not HOLD:
+                if last_buffer is not None:
+                    self.free_buffers.put(last_buffer)
+                last_buffer = buffer
+
+    def write_frame(self, buffer):
+        """
+        Copy a frame into a free buffer (waiting for one if there is none) and put it in the queue.
+
+        :param memoryview buffer: RGBA buffer of shape (height, width, 4), e.g., as returned by
+            `FigureCanvasAgg.buffer_rgba()`. It may be changed as soon as this method returns.
+
+        """
+
+        self.raise_error()
+
+        frame = np.asarray(buffer)
+
+        if self.buffers is None:
+            self.buffers = [np.empty_like(frame) for _ in range(self.queue_size + 1)]
+            for free_buffer in self.buffers:
+                self.free_buffers.put(free_buffer)
+
+        wait_start_time = time.perf_counter()
+        free_buffer = self.free_buffers.get()
+        self.draw_wait += time.perf_counter() - wait_start_time
+
+        np.copyto(free_buffer, frame)
+
+        occupancy = min(self.frames.qsize() + 1, self.queue_size + 1)
+        self.occupancy_total += occupancy
+        self.occupancy_max = max(self.occupancy_max, occupancy)
+
+        wait_start_time = time.perf_counter()
+        self.frames.put(free_buffer)
+        self.draw_wait += time.perf_counter() - wait_start_time
+
+    def write_hold(self):
+        """
+        Write the last frame again (a hold: see `Scene.write_frames`): a marker is put in the queue, and nothing is
+        copied. The writer thread calls the wrapped writer's `write_hold` method (or, if it has none, writes the last
+        frame again).
+
+        """
+
+        self.raise_error()
+
+        if self.buffers is None:
+            raise ValueError('No frame to hold: write_frame must be called first.')
+
+        occupancy = min(self.frames.qsize() + 1, self.queue_size + 1)
+        self.occupancy_total += occupancy
+        self.occupancy_max = max(self.occupancy_max, occupancy)
+
+        # Waits if the queue is full, like write_frame waits for a free buffer
+        wait_start_time = time.perf_counter()
+        self.frames.put(HOLD)
+        self.draw_wait += time.perf_counter() - wait_start_time
+
+    def finish(self):
+        """
+        Wait for the writer thread to write the remaining frames, then finish the wrapped writer.
+
+        """
+
+        try:
+            if self.thread is not None:
+                self.frames.put(None)
+                self.thread.join()
+        finally:
+            self.thread = None
+            # The buffers are not needed anymore (and threads and queues cannot be pickled, e.g., to be sent to
+            # worker processes)
+            self.buffers = None
+            self.free_buffers = None
+            self.frames = None
+            self.writer.finish()
+
+        self.raise_error()
+
+    def raise_error(self):
+        """
+        Raise the error raised by the wrapped writer in the writer thread, if any.
+
+        """
+
+        if self.error is not None:
+            raise RuntimeError(f'Error while writing frames: {self.error}') from self.error
+
+    def get_stats(self):
+        """
+        Return a dictionary with the statistics of the wrapped writer (see `FFMpegPipeWriter.get_stats`) and:
+
+        * `queue_size`;
+
+        * `mean_queue_occupancy` and `max_queue_occupancy`: number of frames (and holds) in the queue when each frame
+          was put in it, including that frame (at most `queue_size + 1`);
+
+        * `draw_wait`: time (in seconds) the main thread waited for a free buffer or a place in the queue, i.e., for
+          encoding;
+
+        * `encode_wait`: time (in seconds) the writer thread waited for frames, i.e., for drawing;
+
+        * `bottleneck`: 'encode' if the main thread waited longer, 'draw' otherwise.
+
+        :return dict:
+
+        """
+
+        stats = self.writer.get_stats()
+
+        stats.update({
+            'queue_size': self.queue_size,
+            'mean_queue_occupancy': self.occupancy_total / stats['frames'] if stats['frames'] else 0.0,
+            'max_queue_occupancy': self.occupancy_max,
+            'draw_wait': self.draw_wait,
+            'encode_wait': self.encode_wait,
+            'bottleneck': 'encode' if self.draw_wait > self.encode_wait else 'draw',
+        })
+
+        return stats
+
+
+def get_default_writer(filename=None):
+    """
+    Return the writer used when none is given: a `ThreadedWriter` if there are several CPUs, an `FFMpegPipeWriter`
+    otherwise (on a single CPU, drawing and encoding cannot overlap, and the writer thread would only add the cost of
+    copying the frames and of switching threads).
+
+    Files other than videos in the formats of `VIDEO_FORMATS` (e.g., GIFs) are saved with matplotlib's movie writer,
+    which knows how to write them (e.g., with a palette for GIFs).
+
+    :param str filename: output file (default: a video in one of the formats of `VIDEO_FORMATS`).
+
+    :return ThreadedWriter|FFMpegPipeWriter|str: a writer, or 'matplotlib'.
+
+    """
+
+    if filename is not None and get_video_format(filename) == (None, None):
+        return 'matplotlib'
+
+    if (os.cpu_count() or 1) > 1:
+        return ThreadedWriter()
+
+    return FFMpegPipeWriter()
@@ -0,0 +1,36 @@
+import ganim as ga
+from ganim.line_elements import DoLineSegment
+from ganim.points import DoPoint
+
+ga.reset_default_style()
+
+# Actions whose end_at comes before their start_after never run: neither alone, nor batched with other segments, nor
+# when they do not change over time. They must not stay drawn (or crash) on the frames after their start
+s1 = ga.Scene()
+s1.add_part(
+    duration=3,
+    script=[
+        DoLineSegment((0, 0), (4, 3), color='green', effect='fadein', start_after=1.5, end_at=1),
+        DoPoint((2, 2), start_after=1.5, end_at=1),
+        DoLineSegment((4, 0), (4, 3), color='blue', effect='grow'),
+        DoLineSegment((0, 0), (4, 0), color='red', effect='fadein', start_after=2, end_at=0.5),
+    ]
+)
+s1.add_part(
+    duration=1,
+    script=[
+        DoLineSegment((0, 0), (4, 3), color='green', start_after=0.8, end_at=0.2),
+        DoLineSegment((4, 0), (4, 3), color='blue', effect='fadein', start_after=0.8, end_at=0.2),
+    ]
+)
+
+s1.cue_parts()
+for part in s1.parts:
+    for frame_no_in_part in range(part.last_frame_no - part.start_frame_no + 1):
+        for action in part.get_active_actions(frame_no_in_part):
+            assert action.start_frame_in_part <= frame_no_in_part <= action.last_active_frame_in_part, action
+
+print(f'Rendering scene s1:\n{s1}...')
+s1.render()
+print('Saving...')
+s1.save('16-empty-actions.mp4')
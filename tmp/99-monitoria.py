@@ -1,6 +1,6 @@
 import ganim as ga
 from ganim.angles import DoAngle
-from ganim.polygons import DoLineSegment
+from ganim.line_elements import DoLineSegment
 
 ga.reset_default_style()
 